@@ -0,0 +1,188 @@
+# Micro-benchmark of the string <-> DecimalNumber conversions
+#
+# Runs on CPython:  python3 bench/bench_convert.py
+#
+# The previous implementations are kept below (old_*) so that both can be
+# timed side by side, and the script checks that they give the same results.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_decimal import timeit
+from decimal import DecimalNumber
+
+
+# ---- Previous implementations (one character / one slice at a time) ----
+
+def old_parse_number(number):
+    """ DecimalNumber._parse_number: one character at a time """
+    step = 1   # 1: '-', 2: [0-9], 3: '.', 4: [0-9]
+    position = 0
+    integer_number = 0
+    is_positive = True
+    num_decimals = 0
+    number = tuple(number,)     # Faster than indexing the string
+    length = len(number)
+    digits = "0123456789"
+    last_valid = 0
+    while position < length:
+        if step == 1:
+            if number[position] == '-':
+                is_positive = False
+                position += 1
+            step = 2
+        elif step == 2:
+            if digits.find(number[position]) != -1:  # [0-9]+
+                integer_number = integer_number * \
+                    10 + int(number[position])
+                position += 1
+                last_valid = position
+            else:
+                step = 3
+        elif step == 3:
+            if number[position] == DecimalNumber.DECIMAL_SEP:
+                position += 1
+                last_valid = position
+            step = 4
+        elif step == 4:
+            if digits.find(number[position]) != -1:  # [0-9]*
+                integer_number = integer_number * \
+                    10 + int(number[position])
+                num_decimals += 1
+                position += 1
+                last_valid = position
+            else:
+                break
+    if last_valid == length:
+        if not is_positive:
+            integer_number = -integer_number
+        return (True, integer_number, num_decimals)
+    else:
+        return (False, 0, 0)
+
+
+def old_str(self, thousands=False):
+    """ DecimalNumber.__str__: separators set with three replace() """
+    #   Integer / Decimals: String
+    #   12345 / 0: 12345
+    #   12345 / 1: 1234.5
+    #   12345 / 2: 123.45
+    #   12345 / 3: 12.345
+    #   12345 / 4: 1.2345
+    #   12345 / 5: 0.12345
+    #   12345 / 6: 0.012345
+    #   12345 / 7: 0.0012345
+    #   12345 / 8: 0.00012345
+    str_number = str(
+        self._number) if self._number >= 0 else str(-self._number)
+    if self._num_decimals != 0:
+        num_digits = len(str_number)
+        if self._num_decimals < num_digits:
+            str_number = str_number[:(
+                num_digits - self._num_decimals)] + "." + str_number[-self._num_decimals:]
+        else:
+            str_number = "0" + "." + \
+                ("0" * (self._num_decimals - num_digits)) + str_number
+
+    if thousands:
+        pos_decimal = str_number.find(".")
+        if pos_decimal == -1:
+            first_part = str_number
+            second_part = ""
+        else:
+            first_part = str_number[:pos_decimal]
+            second_part = str_number[pos_decimal + 1:]
+        first_part = "{:,d}".format(int(first_part))
+        ##### Commenting this part to not separate decimals ###############################
+        # if len(second_part) > 0:
+        #     # Note: reversing with second_part[::-1] is not available for micropython
+        #     second_part = "{:,d}".format(int( ''.join(reversed(second_part)) ))
+        #     second_part = ''.join(reversed(second_part))
+        ###################################################################################
+        str_number = first_part
+        if len(second_part) > 0:
+            str_number += "." + second_part
+
+    str_number = str_number.replace(".", "#")
+    str_number = str_number.replace(",", DecimalNumber.THOUSANDS_SEP)
+    str_number = str_number.replace("#", DecimalNumber.DECIMAL_SEP)
+
+    if not self._is_positive:
+        str_number = "-" + str_number
+
+    return str_number
+
+
+def old_to_string_max_length(self, max_length, thousands=False):
+    """ DecimalNumber.to_string_max_length: zeros stripped one slice at a time """
+    if max_length < 8:
+        max_length = 8
+
+    str_number = old_str(self, thousands)
+    #   1,234,567,890.1234567
+    #   If the number of characters before '.' is greater than max_length --> Overflow
+    pos_point = str_number.find('.')
+    if pos_point == -1:     # No decimals
+        pos_point = len(str_number)
+    if pos_point > max_length:
+        return "Overflow"
+    else:
+        str_number = str_number[:max_length]
+        # If there are decimals, we can eliminate trailing zeros
+        pos_point = str_number.find('.')
+        if pos_point != -1:
+            # 123.34000
+            while str_number[-1:] == '0':
+                str_number = str_number[:-1]
+            # If the last character is a point, it can be deleted
+            if str_number[-1:] == '.':
+                str_number = str_number[:-1]
+        if str_number == "-0":
+            str_number = "0"
+        return str_number
+
+
+# ------------------------------------------------------------------------
+
+def values():
+    """ 17-digit and 100-digit values, as strings """
+    v17 = "-12345678.12345678"
+    v100 = "3" + "1415926535" * 5 + "." + "8979323846" * 4 + "264338327"
+    return [("17", v17), ("100", v100)]
+
+
+def check(text):
+    n = DecimalNumber(text)
+    assert old_parse_number(text) == DecimalNumber._parse_number(text), text
+    assert old_str(n) == str(n), text
+    assert old_str(n, True) == n.to_string_thousands(), text
+    old = old_to_string_max_length(n, 17)
+    if old == "Overflow":
+        # more than 17 integer digits: now shown in exponent form
+        assert "e" in n.to_string_max_length(17), text
+    else:
+        assert old == n.to_string_max_length(17), text
+
+
+def main():
+    DecimalNumber.set_scale(100)
+    for name, text in values():
+        check(text)
+        n = DecimalNumber(text)
+        rows = [
+            ("parse", lambda: old_parse_number(text), lambda: DecimalNumber._parse_number(text)),
+            ("str", lambda: old_str(n), lambda: str(n)),
+            ("thousands", lambda: old_str(n, True), lambda: n.to_string_thousands()),
+            ("max_length", lambda: old_to_string_max_length(n, 17), lambda: n.to_string_max_length(17)),
+        ]
+        for op, old, new in rows:
+            t_old = timeit(old)
+            t_new = timeit(new)
+            print("{:<14} {:10.3f} us {:10.3f} us  x{:.1f}".format(
+                op + "_" + name, t_old, t_new, t_old / t_new))
+
+
+if __name__ == "__main__":
+    main()
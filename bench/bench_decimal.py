@@ -0,0 +1,157 @@
+# Host micro-benchmarks for firmware/decimal.py
+#
+# Runs on CPython:  python3 bench/bench_decimal.py [scale]
+#
+# The absolute numbers are much smaller than on the RP2350, but relative
+# changes between two revisions of decimal.py carry over to the device.
+#
+# It also runs on the device (copy it next to decimal.py and import it), where
+# a second column shows the bytes allocated on the heap per call.
+
+import gc
+import sys
+import time
+
+if sys.implementation.name == "cpython":
+    import os
+    # firmware/decimal.py shadows the standard library module of the same name
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "firmware"))
+    perf_counter = time.perf_counter
+else:
+    def perf_counter():
+        return time.ticks_us() / 1e6
+
+from decimal import DecimalNumber, DecimalContext
+
+
+def timeit(fn, min_time=0.05, repeat=5):
+    """ Returns the best time per call of fn() in microseconds """
+    n = 1
+    while True:
+        start = perf_counter()
+        for i in range(n):
+            fn()
+        elapsed = perf_counter() - start
+        if elapsed >= min_time:
+            break
+        n *= 2
+    best = elapsed
+    for r in range(repeat - 1):
+        start = perf_counter()
+        for i in range(n):
+            fn()
+        best = min(best, perf_counter() - start)
+    return best * 1e6 / n
+
+
+def allocated(fn, n=100):
+    """ Returns the bytes allocated on the heap per call of fn(), or None when
+    the interpreter cannot tell (CPython) """
+    if not hasattr(gc, "mem_alloc"):
+        return None
+    gc.collect()
+    gc.disable()
+    before = gc.mem_alloc()
+    for i in range(n):
+        fn()
+    after = gc.mem_alloc()
+    gc.enable()
+    return (after - before) / n
+
+
+def horner(coefficients, x):
+    """ A chain of operations: the polynomial with 'coefficients' at x """
+    r = coefficients[0]
+    for c in coefficients[1:]:
+        r = r * x + c
+    return r
+
+
+def horner_deferred(coefficients, x):
+    with DecimalContext(deferred=True):
+        return horner(coefficients, x).normalize()
+
+
+def cases():
+    a = DecimalNumber("12345678.12345678")
+    b = DecimalNumber("0.987654321")
+    c = DecimalNumber("3")
+    h = DecimalNumber("2.5")
+    # typical calculator entries: same number of decimals, small mantissas
+    x = DecimalNumber("1234.56")
+    y = DecimalNumber("78.90")
+    # 17 digits, the width of the display
+    u = DecimalNumber("1234567890.123456")
+    v = DecimalNumber("9876543210.654321")
+    poly = [DecimalNumber(k) / 7 for k in range(1, 9)]
+    return [
+        ("add_small", lambda: x + y),
+        ("sub_small", lambda: x - y),
+        ("mul_small", lambda: x * y),
+        ("cmp_small", lambda: x < y),
+        ("cmp_int", lambda: c == 3),
+        ("add_17", lambda: u + v),
+        ("mul_17", lambda: u * v),
+        ("cmp_17", lambda: u < v),
+        ("chain", lambda: horner(poly, b)),
+        ("chain_defer", lambda: horner_deferred(poly, b)),
+        ("add", lambda: a + b),
+        ("sub", lambda: a - b),
+        ("mul", lambda: a * b),
+        ("div", lambda: a / b),
+        ("div_int", lambda: a / c),
+        ("compare", lambda: a < b),
+        ("equal", lambda: a == b),
+        ("exp", lambda: b.exp()),
+        ("exp_large", lambda: DecimalNumber(40).exp()),
+        ("ln", lambda: a.ln()),
+        ("ln_near_1", lambda: b.ln()),
+        ("sin", lambda: b.sin()),
+        ("cos", lambda: b.cos()),
+        ("tan", lambda: b.tan()),
+        ("sin_large", lambda: a.sin()),
+        ("sin_degrees", lambda: a.sin(True)),
+        ("asin", lambda: (b - 1).asin()),
+        ("atan", lambda: b.atan()),
+        ("atan2", lambda: DecimalNumber.atan2(b, a)),
+        ("pow", lambda: b ** 7),
+        ("pow_neg", lambda: b ** -7),
+        ("pow_half", lambda: a ** h),
+        ("pow_real", lambda: a ** b),
+        ("pow_huge", lambda: a ** 1000),
+        ("sqrt", lambda: a.square_root()),
+        ("cbrt", lambda: a.nthroot(3)),
+    ]
+
+
+def cached_cases():
+    """ Repeated calls, answered by the results cache """
+    a = DecimalNumber("12345678.12345678")
+    b = DecimalNumber("0.987654321")
+    return [
+        ("ln_cached", lambda: a.ln()),
+        ("sin_cached", lambda: b.sin()),
+    ]
+
+
+def run(cases):
+    for name, fn in cases:
+        line = "{:<12} {:10.3f} us".format(name, timeit(fn))
+        alloc = allocated(fn)
+        if alloc is not None:
+            line += " {:8.1f} B".format(alloc)
+        print(line)
+
+
+def main(scale=16):
+    DecimalNumber.set_scale(scale)
+    print("scale", scale)
+    # the results cache would answer the repeated calls of the functions
+    DecimalNumber.set_cache_size(0)
+    run(cases())
+    DecimalNumber.set_cache_size(32)
+    run(cached_cases())
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
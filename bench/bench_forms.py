@@ -0,0 +1,88 @@
+# Host benchmark of solve(), integrate() and sum(), see mathexpr FORMS
+#
+# Runs on CPython:  python3 bench/bench_forms.py
+#
+# check() runs first: the forms on roots that are hard to bracket, on
+# integrals singular at an end or over a wide interval, and in fraction
+# mode on a variable holding a Fraction.  As for bench_decimal, track the
+# relative changes of the times: the RP2350 is much slower.
+
+from bench_decimal import run     # puts firmware/ in front of sys.path
+from decimal import DecimalNumber, DecimalNumberException
+import mathexpr
+
+
+def evaluate(text, variables, fractions=False):
+    res = mathexpr.compile_expression(text, variables, fractions)(variables)
+    return res.to_string_max_length(17)
+
+
+def check():
+    variables = mathexpr.Variables(['M1', 'M2', 'M3', 'x'])
+    for text, expected in (
+            ("solve(x^2-2,1)", "1.414213562373095"),
+            ("solve(exp(x)-1000,0)", "6.907755278982137"),
+            ("solve(x^3-2*x+2,0)", "-1.76929235423863"),
+            ("solve(1/x-3,1)", "0.333333333333333"),
+            ("solve(x^3-1e30,1)", "10000000000"),
+            ("solve((x-1)^2,3)", "1.000000005945501"),
+            # singular at 0, computed again in the variable of _smoothed
+            ("integrate(ln(x),0,1)", "-1"),
+            ("integrate(1/sqrt(x),0,1)", "2"),
+            # wide intervals, the integral far above the rule on the whole
+            ("integrate(1/x,1,1e10)", "23.02585092994045"),
+            ("integrate(1/(1+x^2),0,1e6)", "1.570795326794896"),
+    ):
+        assert evaluate(text, variables) == expected, text
+    # f only rounds to 0 far away: no root; a pole inside: no integral;
+    # too many terms, in both modes
+    for text, fractions in (
+            ("solve(1/x,1)", False),
+            ("solve(exp(-x),0)", False),
+            ("integrate(1/x,-1,1)", False),
+            ("sum(1,i,1,1e9)", False),
+            ("sum(1,i,1,1e9)", True),
+    ):
+        try:
+            evaluate(text, variables, fractions)
+        except DecimalNumberException:
+            pass
+        else:
+            assert False, text
+    # a variable holding a Fraction, in the expression of the forms
+    evaluate("M3=1/3", variables, True)
+    for text, expected in (
+            ("solve(x^2-M3,1)", "0.577350269189625"),
+            ("integrate(x*M3,0,1)", "0.166666666666666"),
+    ):
+        assert evaluate(text, variables, True) == expected, text
+    # rational terms add up exactly in fraction mode
+    for text, numerator, denominator in (
+            ("sum(i/3,i,1,3)", 2, 1),
+            ("sum(i*M3,i,1,3)", 2, 1),
+            ("sum(1/i,i,1,4)", 25, 12),
+    ):
+        res = mathexpr.compile_expression(text, variables, True)(variables)
+        assert (res.numerator, res.denominator) == (numerator, denominator), text
+
+
+def cases():
+    variables = mathexpr.Variables(['M1', 'x'])
+    solve = mathexpr.compile_expression("solve(cos(x)-x,1)", variables)
+    integrate = mathexpr.compile_expression("integrate(sin(x),0,pi)", variables)
+    total = mathexpr.compile_expression("sum(1/i^2,i,1,100)", variables)
+    return [
+        ("solve", lambda: solve(variables)),
+        ("integrate", lambda: integrate(variables)),
+        ("sum_100", lambda: total(variables)),
+    ]
+
+
+def main():
+    DecimalNumber.set_scale(16)
+    check()
+    run(cases())
+
+
+if __name__ == "__main__":
+    main()
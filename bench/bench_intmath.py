@@ -0,0 +1,42 @@
+# Host benchmark of the integer functions of firmware/intmath.py
+#
+# Runs on CPython:  python3 bench/bench_intmath.py
+#
+# The cases are the largest the calculator is expected to answer at
+# interactive latency: 1000! and the factors of 17 digit numbers, the
+# hardest being the product of two primes of 8 and 9 digits.  As for
+# bench_decimal, track the relative changes: the RP2350 is much slower.
+# The expr cases compare an expression in programmer mode with decimals.
+# It also runs on the device (copy it next to intmath.py and import it).
+
+from bench_decimal import run     # puts firmware/ in front of sys.path
+import intmath
+import mathexpr
+
+
+def cases():
+    variables = mathexpr.Variables(['M1'])
+    text = "(M1 * 3 + 85) * 7 - M1"
+    decimal_expr = mathexpr.compile_expression(text, variables)
+    int_expr = mathexpr.compile_expression(text, variables, width=32)
+    return [
+        # the same expression, on DecimalNumber and in programmer mode
+        ("expr_decimal", lambda: decimal_expr(variables)),
+        ("expr_int32", lambda: int_expr(variables)),
+        ("fact_100", lambda: intmath.factorial(100)),
+        ("fact_1000", lambda: intmath.factorial(1000)),
+        ("ncr_1000", lambda: intmath.ncr(1000, 500)),
+        ("npr_1000", lambda: intmath.npr(1000, 500)),
+        ("gcd", lambda: intmath.gcd(2 ** 61 - 1, 3 ** 38)),
+        ("is_prime_17", lambda: intmath.is_prime(10 ** 16 + 61)),
+        ("factor_17", lambda: intmath.factorize(12345678901234567)),
+        ("factor_semi", lambda: intmath.factorize(99999989 * 100000007)),
+    ]
+
+
+def main():
+    run(cases())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# Benchmark of the DecimalNumber operations against the standard library
+#
+# Runs on CPython:  python3 bench/bench_stdlib.py [scale ...]    (default: 16 34 100)
+#
+# Every operation is timed with DecimalNumber and with the stdlib decimal
+# module at a comparable precision, and the DecimalNumber result is checked
+# against a stdlib reference computed with many more digits and rounded half
+# to even to the scale. The stdlib has no trigonometric functions or pi: the
+# recipes of its documentation are used instead.
+#
+# The output is one JSON object per line, e.g.
+#   {"op": "exp", "scale": 16, "us": 8.81, "std_us": 14.2, "ulp": 0}
+# 'ulp' is the error in units of the last digit kept: 10**-scale, or the last
+# significant digit of the exponent form (see DecimalNumber.INTEGER_DIGITS).
+# The exit status is 1 if any result is off by more than MAX_ULP.
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_decimal import timeit      # puts firmware/ in front of sys.path
+import decimal as firmware_decimal
+from decimal import DecimalNumber
+
+# firmware/decimal.py shadows the standard library module: import the latter
+# under another name, then put things back.
+_firmware_path = sys.path.pop(0)
+del sys.modules["decimal"]
+import decimal as std
+sys.modules["decimal"] = firmware_decimal
+sys.path.insert(0, _firmware_path)
+
+MAX_ULP = 1
+SCALES = (16, 34, 100)
+
+
+# ---- Recipes from the documentation of the decimal module ----
+
+def std_pi():
+    """ pi to the current precision """
+    std.getcontext().prec += 2
+    three = std.Decimal(3)
+    lasts, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+    while s != lasts:
+        lasts = s
+        n, na = n + na, na + 8
+        d, da = d + da, da + 32
+        t = (t * n) / d
+        s += t
+    std.getcontext().prec -= 2
+    return +s
+
+
+def std_cos(x):
+    """ cos(x), x in radians """
+    std.getcontext().prec += 2
+    i, lasts, s, fact, num, sign = 0, 0, 1, 1, 1, 1
+    while s != lasts:
+        lasts = s
+        i += 2
+        fact *= i * (i - 1)
+        num *= x * x
+        sign *= -1
+        s += num / fact * sign
+    std.getcontext().prec -= 2
+    return +s
+
+
+def std_sin(x):
+    """ sin(x), x in radians """
+    std.getcontext().prec += 2
+    i, lasts, s, fact, num, sign = 1, 0, x, 1, x, 1
+    while s != lasts:
+        lasts = s
+        i += 2
+        fact *= i * (i - 1)
+        num *= x * x
+        sign *= -1
+        s += num / fact * sign
+    std.getcontext().prec -= 2
+    return +s
+
+
+def std_atan(x):
+    """ atan(x): the argument is halved twice, atan(x) = 2 atan(x / (1 + sqrt(1 + x²))) """
+    std.getcontext().prec += 4
+    for i in range(2):
+        x = x / (1 + (1 + x * x).sqrt())
+    lasts, s, num, i = 0, x, x, 1
+    while s != lasts:
+        lasts = s
+        num *= -x * x
+        i += 2
+        s += num / i
+    s *= 4
+    std.getcontext().prec -= 4
+    return +s
+
+
+# ------------------------------------------------------------------------
+
+def operations(a, b):
+    """ (name, DecimalNumber operation, stdlib operation) for operands a, b:
+    the stdlib operations take the stdlib values of a and b """
+    text = str(a)
+    return [
+        ("parse", lambda: DecimalNumber(text), lambda x, y: std.Decimal(text)),
+        ("str", lambda: str(a), lambda x, y: str(x)),
+        ("add", lambda: a + b, lambda x, y: x + y),
+        ("sub", lambda: a - b, lambda x, y: x - y),
+        ("mul", lambda: a * b, lambda x, y: x * y),
+        ("div", lambda: a / b, lambda x, y: x / y),
+        ("pow", lambda: a ** 7, lambda x, y: x ** 7),
+        ("pow_real", lambda: a ** b, lambda x, y: x ** y),
+        ("sqrt", lambda: a.square_root(), lambda x, y: x.sqrt()),
+        ("exp", lambda: b.exp(), lambda x, y: y.exp()),
+        ("ln", lambda: a.ln(), lambda x, y: x.ln()),
+        ("sin", lambda: b.sin(), lambda x, y: std_sin(y)),
+        ("cos", lambda: b.cos(), lambda x, y: std_cos(y)),
+        ("atan", lambda: b.atan(), lambda x, y: std_atan(y)),
+        ("pi", lambda: DecimalNumber.pi(), lambda x, y: std_pi()),
+        ("pi_digits", lambda: firmware_decimal._pi_digits(DecimalNumber.get_scale()),
+            lambda x, y: std_pi()),
+    ]
+
+
+def operands(scale):
+    """ Two operands with 'scale' decimals: 1234567.89... and 0.98765... """
+    with std.localcontext() as ctx:
+        ctx.prec = scale + 20
+        q = std.Decimal(1).scaleb(-scale)
+        a = (std_pi() * 393000).quantize(q)
+        b = (1 - 1 / std.Decimal(81)).quantize(q)
+    return DecimalNumber(str(a)), DecimalNumber(str(b))
+
+
+def ulp_error(result, reference, scale):
+    """ |result - reference| in units of the last digit kept """
+    if isinstance(result, str):
+        result = DecimalNumber(result)
+    elif isinstance(result, int):      # pi_digits
+        result = DecimalNumber(result) / DecimalNumber(10) ** scale
+    with std.localcontext() as ctx:
+        ctx.prec = 2 * scale + 100
+        r = std.Decimal(str(result))
+        if abs(reference) >= 10 ** DecimalNumber.INTEGER_DIGITS:
+            digits = scale + DecimalNumber.INTEGER_DIGITS
+            ulp = std.Decimal(1).scaleb(reference.adjusted() + 1 - digits)
+            exact = std.Context(prec=digits, rounding=std.ROUND_HALF_EVEN).plus(reference)
+        else:
+            ulp = std.Decimal(1).scaleb(-scale)
+            exact = reference.quantize(ulp, rounding=std.ROUND_HALF_EVEN)
+        return int(abs(r - exact) / ulp)
+
+
+def bench(scale):
+    """ Yields one result dict per operation """
+    DecimalNumber.set_scale(scale)
+    a, b = operands(scale)
+    x, y = std.Decimal(str(a)), std.Decimal(str(b))
+    for name, fn, std_fn in operations(a, b):
+        with std.localcontext() as ctx:
+            ctx.prec = scale + 60
+            ctx.rounding = std.ROUND_HALF_EVEN
+            reference = std.Decimal(std_fn(x, y))
+        with std.localcontext() as ctx:
+            # the significant digits that DecimalNumber keeps for these operands
+            ctx.prec = scale + DecimalNumber.INTEGER_DIGITS
+            std_us = timeit(lambda: std_fn(x, y))
+        yield {
+            "op": name,
+            "scale": scale,
+            "us": round(timeit(fn), 3),
+            "std_us": round(std_us, 3),
+            "ulp": ulp_error(fn(), reference, scale),
+        }
+
+
+def main(scales=SCALES):
+    # the repeated calls would be answered by the results cache
+    DecimalNumber.set_cache_size(0)
+    failed = False
+    for scale in scales:
+        for row in bench(scale):
+            print(json.dumps(row))
+            failed = failed or row["ulp"] > MAX_ULP
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main([int(arg) for arg in sys.argv[1:]] or SCALES))
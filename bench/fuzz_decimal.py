@@ -0,0 +1,214 @@
+# Differential fuzzer of DecimalNumber against the stdlib decimal module
+#
+# Runs on CPython:  python3 bench/fuzz_decimal.py [cases] [seed]
+#
+# Random operands across magnitudes and scales go through DecimalNumber and
+# through the stdlib module, with the same rounding (half to even, as in
+# DecimalNumber._reduce_to_scale) and many more digits, see bench_stdlib.
+# The operands are first parsed by DecimalNumber, so both sides work on the
+# same values.
+#
+# A failing case is shrunk to a minimal reproducer: fewer digits, smaller
+# magnitudes and a smaller scale, as long as it still fails. The output is
+# one JSON object per line: the failures, then one summary per operation
+# with the number of cases, the failures, the largest ulp error and the
+# mean time per case of both implementations. The exit status is 1 if any
+# case failed.
+
+import json
+import random
+import sys
+import time
+
+from bench_stdlib import std, std_pi, std_sin, std_cos, std_atan, ulp_error
+from decimal import DecimalNumber, DecimalNumberException
+
+CASES = 300
+SCALES = (0, 2, 4, 8, 16, 20, 34, 50)
+MAX_SHRINK_STEPS = 500
+
+
+def std_reduce(x):
+    """ x modulo 2 pi, so that the series recipes converge """
+    with std.localcontext() as ctx:
+        ctx.prec += max(x.adjusted(), 0) + 2
+        two_pi = 2 * std_pi()
+        x = x - (x / two_pi).to_integral_value() * two_pi
+    return +x
+
+
+# name: (DecimalNumber operation, stdlib operation, operand generators, largest ulp error)
+# The generators take (random, scale) and return the text of an operand.
+
+def any_number(rnd, scale):
+    """ 1 to scale + 18 significant digits, from 10**-(scale + 4) to 10**40 """
+    digits = rnd.randint(1, scale + DecimalNumber.INTEGER_DIGITS)
+    n = std.Decimal(rnd.randrange(10 ** (digits - 1), 10 ** digits))
+    n = n.scaleb(rnd.randint(-scale - 4 - digits, 40 - digits))
+    return "{:f}".format(-n if rnd.random() < 0.5 else n)
+
+
+def positive(rnd, scale):
+    return any_number(rnd, scale).lstrip("-")
+
+
+def small(rnd, scale):
+    """ |x| < 300 """
+    digits = rnd.randint(1, scale + 3)
+    n = std.Decimal(rnd.randrange(0, 3 * 10 ** digits)).scaleb(-rnd.randint(digits - 2, digits))
+    return "{:f}".format(-n if rnd.random() < 0.5 else n)
+
+
+def angle(rnd, scale):
+    """ |x| < 10**6 """
+    n = std.Decimal(rnd.randrange(0, 10 ** (scale + 6))).scaleb(-scale)
+    return "{:f}".format(-n if rnd.random() < 0.5 else n)
+
+
+def integer(rnd, scale):
+    return str(rnd.randint(-25, 25))
+
+
+def exponent(rnd, scale):
+    return "{:f}".format(std.Decimal(rnd.randint(-3000, 3000)).scaleb(-rnd.randint(1, 3)))
+
+
+def base(rnd, scale):
+    """ 0.01 to 100 """
+    return "{:f}".format(std.Decimal(rnd.randint(1, 10 ** 6)).scaleb(-4))
+
+
+OPS = {
+    "add": (lambda a, b: a + b, lambda x, y: x + y, (any_number, any_number), 0),
+    "sub": (lambda a, b: a - b, lambda x, y: x - y, (any_number, any_number), 0),
+    "mul": (lambda a, b: a * b, lambda x, y: x * y, (any_number, any_number), 0),
+    "div": (lambda a, b: a / b, lambda x, y: x / y, (any_number, any_number), 1),
+    "cmp": (lambda a, b: (a < b) - (a > b), lambda x, y: (x < y) - (x > y), (any_number, any_number), 0),
+    "pow": (lambda a, b: a ** b, lambda x, y: x ** y, (base, integer), 1),
+    "pow_real": (lambda a, b: a ** b, lambda x, y: x ** y, (base, exponent), 1),
+    "sqrt": (lambda a: a.square_root(), lambda x: x.sqrt(), (positive,), 0),
+    "exp": (lambda a: a.exp(), lambda x: x.exp(), (small,), 1),
+    "ln": (lambda a: a.ln(), lambda x: x.ln(), (positive,), 1),
+    "sin": (lambda a: a.sin(), lambda x: std_sin(std_reduce(x)), (angle,), 1),
+    "cos": (lambda a: a.cos(), lambda x: std_cos(std_reduce(x)), (angle,), 1),
+    "atan": (lambda a: a.atan(), lambda x: std_atan(x), (any_number,), 1),
+}
+
+
+def run(op, scale, texts):
+    """ Returns (ulp error, DecimalNumber result, expected, us, std us) for one case """
+    fn, std_fn, generators, max_ulp = OPS[op]
+    DecimalNumber.set_scale(scale)
+    numbers = [DecimalNumber(t) for t in texts]
+    if op == "pow":
+        numbers[1] = int(texts[1])
+    values = [std.Decimal(str(n)) for n in numbers]
+    if any(v == 0 for v in values[1:]) and op == "div":
+        return None
+    if op == "ln" and values[0] == 0:
+        return None
+    with std.localcontext() as ctx:
+        ctx.prec = 2 * scale + 100
+        ctx.rounding = std.ROUND_HALF_EVEN
+        start = time.perf_counter()
+        expected = std.Decimal(std_fn(*values))
+        std_us = (time.perf_counter() - start) * 1e6
+    start = time.perf_counter()
+    try:
+        result = fn(*numbers)
+    except DecimalNumberException as e:
+        return (-1, repr(e), str(expected), 0, std_us)
+    us = (time.perf_counter() - start) * 1e6
+    if isinstance(result, int):
+        ulp = 0 if result == expected else -1
+    else:
+        ulp = ulp_error(result, expected, scale)
+    return (ulp, str(result), str(expected), us, std_us)
+
+
+def failed(op, scale, texts):
+    r = run(op, scale, texts)
+    return r is not None and (r[0] < 0 or r[0] > OPS[op][3])
+
+
+def simpler(text):
+    """ Yields simpler variants of a number: fewer digits, closer to 1, positive """
+    v = std.Decimal(text)
+    if v < 0:
+        yield "{:f}".format(-v)
+    digits = len(v.as_tuple().digits)
+    with std.localcontext() as ctx:
+        ctx.prec = digits + 100
+        if digits > 1:
+            ctx2 = std.Context(prec=digits - 1, rounding=std.ROUND_DOWN)
+            yield "{:f}".format(ctx2.plus(v))
+        if v.as_tuple().exponent < 0:
+            yield "{:f}".format(v.quantize(std.Decimal(1).scaleb(v.as_tuple().exponent + 1), rounding=std.ROUND_DOWN))
+        if v.adjusted() > 0:
+            yield "{:f}".format(v.scaleb(-1))
+        elif v.adjusted() < 0:
+            yield "{:f}".format(v.scaleb(1))
+
+
+def shrink(op, scale, texts):
+    """ Greedy reduction of a failing case, one simplification at a time """
+    for step in range(MAX_SHRINK_STEPS):
+        candidates = []
+        if scale > 0:
+            candidates.append((scale - 1, texts))
+        for i, text in enumerate(texts):
+            if op == "pow" and i == 1:
+                if abs(int(text)) > 1:
+                    candidates.append((scale, texts[:1] + [str(int(text) // 2)]))
+                continue
+            for t in simpler(text):
+                candidates.append((scale, texts[:i] + [t] + texts[i + 1:]))
+        for c_scale, c_texts in candidates:
+            if c_texts != texts or c_scale != scale:
+                if failed(op, c_scale, c_texts):
+                    scale, texts = c_scale, c_texts
+                    break
+        else:
+            break
+    return scale, texts
+
+
+def main(cases=CASES, seed=1):
+    DecimalNumber.set_cache_size(0)
+    rnd = random.Random(seed)
+    any_failed = False
+    for op, (fn, std_fn, generators, max_ulp) in OPS.items():
+        count = failures = worst = 0
+        total_us = total_std_us = 0.0
+        for i in range(cases):
+            scale = rnd.choice(SCALES)
+            texts = [g(rnd, scale) for g in generators]
+            r = run(op, scale, texts)
+            if r is None:
+                continue
+            ulp, result, expected, us, std_us = r
+            count += 1
+            total_us += us
+            total_std_us += std_us
+            worst = max(worst, ulp)
+            if ulp < 0 or ulp > max_ulp:
+                failures += 1
+                s_scale, s_texts = shrink(op, scale, texts)
+                s = run(op, s_scale, s_texts)
+                print(json.dumps({
+                    "fail": op, "scale": scale, "operands": texts, "ulp": ulp,
+                    "result": result, "expected": expected,
+                    "shrunk": {"scale": s_scale, "operands": s_texts, "ulp": s[0],
+                               "result": s[1], "expected": s[2]},
+                }))
+        any_failed = any_failed or failures > 0
+        print(json.dumps({
+            "op": op, "cases": count, "failures": failures, "max_ulp": worst,
+            "us": round(total_us / max(count, 1), 3),
+            "std_us": round(total_std_us / max(count, 1), 3),
+        }))
+    return 1 if any_failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:]]))
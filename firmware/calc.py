@@ -4,7 +4,6 @@
 # https://git.sr.ht/~twentyafterfour/macro-calculator
 
 import time
-import re
 import io
 import os
 import machine
@@ -23,27 +22,50 @@ import style
 from style import Menu,HIDDEN
 from settimeout import setTimeout
 from decimal import DecimalNumber
+from fraction import Fraction
+import mathexpr
+import intmath
+import programmer
+import solver
 from usbkeypad import KeypadInterface
 from history import History
+from stats import Statistics
+import rpn
 
 DecimalNumber.set_scale(16)
+DecimalNumber.set_cache_size(32)
 MAX_LINE_LEN = const(17)
+# Results too large or too small for the display are shown in scientific
+# notation, 1.2345e20, or in engineering notation, 123.45e18, when this is set.
+ENGINEERING = False
+# The base of the results of programmer mode, see programmer.BASES
+BASE = 16
 
 
 def numformat(num):
-    if type(num) is DecimalNumber:
-        return num.to_string_max_length(17)
+    if type(num) is DecimalNumber or type(num) is Fraction:
+        return num.to_string_max_length(MAX_LINE_LEN, engineering=ENGINEERING)
+    elif type(num) is int:
+        return programmer.format_int(num, BASE, MAX_LINE_LEN)
     else:
         return "{: 16.10g}".format(num)
 
-M1 = 0
-M2 = 0
-M3 = 0
-M4 = 0
-
-num_expr = "([M0-9\.]+)*"
-oper_expr = "([\+\-\*\/\=])?"
-tok = re.compile("^"+num_expr+oper_expr+num_expr+"(.*)")
+def to_decimal(num):
+    """ the DecimalNumber value of a result of any mode """
+    if type(num) is Fraction:
+        return num.to_decimal()
+    elif type(num) is int:
+        return DecimalNumber(num)
+    return num
+
+# User variables.  M1 holds the most recent result and M2 the one before it,
+# M3 and M4 are free for the user.  Any other name becomes a new slot when it
+# is first assigned.
+variables = mathexpr.Variables()
+M1 = variables.slot('M1')
+M2 = variables.slot('M2')
+M3 = variables.slot('M3')
+M4 = variables.slot('M4')
 
 kpp = None
 kpd = None
@@ -76,6 +98,12 @@ def lvgl_keypad_read(kp, data):
                 else:
                     app.k.send_key(None)
                 return
+            if app.rpn_mode and keyboard.layer == 0 and key[2] in rpn.OPERATORS:
+                # the operator keys act on the stack, the entry line stays as it is
+                if value:
+                    app.rpn_operator(key[2])
+                kp.stop_processing()
+                return
             if keyboard.layer==1:
                 if keycode == keymap.KP8:
                     data.key = lv.KEY.UP
@@ -124,12 +152,33 @@ class Calc:
     operators = ('+', '-', '*', '/', '%', '^', '<', '>', '!')
 
     saved_expr = None
+    # statistics mode: every result entered is also added to self.stats
+    stats_mode = False
+    # RPN mode (Shift + NumLock): ENTER pushes the entry line on self.stack and
+    # the operator keys apply to the stack, which is shown instead of the history
+    rpn_mode = False
+    # fraction mode: expressions compute exact Fractions (see mathexpr.FractionParser)
+    fraction_mode = False
+    # programmer mode: the width in bits of the ints expressions compute
+    # (see mathexpr.IntegerParser), 0 when off
+    int_width = 0
 
     def __init__(self):
         # some global state is stored in the keymap.keyboard singleton object
         global keyboard
         keyboard.app = self
 
+        # the macro keys are bound to variable slots
+        self.key_slots = {
+            keymap.F13: M1,
+            keymap.F14: M2,
+            keymap.F15: M3,
+            keymap.F16: M4,
+        }
+
+        self.stats = Statistics()
+        self.stack = rpn.Stack()
+
         self.NUMLOCK(True)
         self.scr = lv.obj()
         self.scr.add_style(style.DEFAULT, lv.PART.MAIN)
@@ -174,6 +223,14 @@ class Calc:
         # lvgl callback to evaluate the user's expression input
         self.txt.add_event_cb(self.ENTER, lv.EVENT.READY, None)
 
+        # The angle unit at the top left, the messages below cover it
+        self.status = self.text_line(0, self.small_font, self.scr)
+        self.status.add_flag(self.status.FLAG.FLOATING)
+        self.status.set_width(lv.SIZE_CONTENT)
+        self.status.set_style_text_align(lv.TEXT_ALIGN.LEFT, 0)
+        self.status.set_style_text_color(style.lightblue, lv.PART.MAIN)
+        self.show_status()
+
         # And a label above the top line, to be shown when there is an input error.
         # Remains hidden until there is something to show.
         self.msg = self.text_line(0, self.small_font, self.scr)
@@ -257,6 +314,10 @@ class Calc:
         """ hide the feedback / error message text """
         self.msg.add_flag(HIDDEN)
 
+    def show_status(self):
+        """ show the angle unit of the trigonometric functions """
+        self.status.set_text('DEG' if mathexpr.DEGREES else 'RAD')
+
     def focus_changed(self, e):
         target = e.get_target_obj()
         self.focused_widget = target
@@ -338,69 +399,248 @@ class Calc:
         if keyboard.layer == 1:
             self.insert_text("=")
             return
-
-        global M1, M2, M3, M4
+        if self.rpn_mode:
+            self.rpn_enter()
+            return
 
         try:
-            orig_expr = self.txt.get_text().strip()
-            if orig_expr == "":
+            saved_expr = self.txt.get_text().strip()
+            if saved_expr == "":
+                self.show_cache_info()
                 return
-            out = []
-            saved_expr = orig_expr
-            while len(orig_expr) > 0:
-                groups = None
-                print("tokenize: ",orig_expr)
-                expr = tok.match(orig_expr)
-                print('done tokenizing')
-                if expr:
-                    groups = expr.groups()
-                    end = expr.end()
-                    orig_expr = orig_expr[end:]
-                if not groups:
-                    groups = [orig_expr]
-                    orig_expr = ""
-                for group in groups:
-                    if group is None or group == "":
-                        continue
-                    if group[0].isdigit():
-                        out.append('DecimalNumber("'+group+'")')
-                    else:
-                        out.append(group)
-
-            assign = None
-            if len(out) > 1 and out[1] == '=' and (out[0] == 'M3' or out[0] == 'M4'):
-                assign = out[0]
-                out = out[2:]
-
-            expr = "".join(out)
-            if (expr[0] in ("+","/","*","-")):
-                expr = "M1" + expr
-            print('eval:',str(expr))
-            res = eval(str(expr))
-            if type(res) is float:
-                res = DecimalNumber(str(res))
-            elif type(res) is not DecimalNumber:
+            text = saved_expr
+            if text[0] in ("+","/","*","-"):
+                # an expression starting with an operator continues from the last result
+                text = "M1" + text
+
+            expr = mathexpr.compile_expression(text, variables, self.fraction_mode,
+                                               self.int_width)
+            if expr.target == M1 or expr.target == M2:
+                raise RuntimeError("Can't assign to " + expr.target_name)
+
+            solver.last = None
+            res = expr(variables)
+            if (not self.int_width and type(res) is not DecimalNumber
+                    and type(res) is not Fraction):
                 res = DecimalNumber(res)
-            if assign == 'M3':
-                M3 = res
-            elif assign == 'M4':
-                M4 = res
 
-            self.history.append(numformat(res))
-
-            M2 = M1
-            M1 = res
-            self.hide_msg()
+            self.push_result(res)
+            if self.stats_mode:
+                self.stats.add(to_decimal(res))
+            if solver.last is not None:
+                iterations, ms = solver.last
+                self.show_msg('solved: ' + str(iterations) + ' iterations ' + str(ms) + ' ms')
+            else:
+                self.hide_msg()
 
             self.txt.set_text("")
             self.saved_expr = saved_expr
 
 
+        except MemoryError:
+            # drop what can be recomputed
+            DecimalNumber.cache_clear()
+            mathexpr.cache.clear()
+            self.show_msg('Out of memory', 8, style.red)
+
         except Exception as e:
             self.show_err(e)
 
         #self.send_key(keymap.ENTER)
 
+    def toggle_rpn(self):
+        """ switch between algebraic and RPN entry """
+        self.rpn_mode = not self.rpn_mode
+        if self.rpn_mode:
+            self.show_stack()
+            self.show_msg('RPN')
+        else:
+            self.history.refresh()
+            self.show_msg('algebraic')
+
+    def show_stack(self):
+        """ show x, y and z on the lines above the entry line """
+        stack = self.stack
+        for i, line in enumerate(self.lines[1:]):
+            line.set_text(numformat(stack.peek(i)) if i < len(stack) else '')
+
+    def rpn_entry(self):
+        """ push the number on the entry line, if any """
+        text = self.txt.get_text().strip()
+        if text == '':
+            return False
+        self.stack.push(DecimalNumber(text))
+        self.txt.set_text('')
+        return True
+
+    def rpn_enter(self):
+        """ ENTER in RPN mode pushes the entry line, or duplicates x """
+        try:
+            if not self.rpn_entry():
+                self.stack.push(self.stack.peek())
+            self.hide_msg()
+        except Exception as e:
+            self.show_err(e)
+        self.show_stack()
+
+    def rpn_operator(self, symbol):
+        """ y <op> x replaces y and x, and becomes M1 """
+        try:
+            self.rpn_entry()
+            res = self.stack.apply(rpn.OPERATORS[symbol])
+            values = variables.values
+            values[M2] = values[M1]
+            values[M1] = res
+            self.hide_msg()
+        except Exception as e:
+            self.show_err(e)
+        self.show_stack()
+
+    def CHS(self, keydown):
+        """ Shift + -: change the sign of the entry line, or of x in RPN mode
+            when the entry line is empty
+        """
+        if not keydown:
+            return
+        text = self.txt.get_text().strip()
+        if self.rpn_mode and text == '':
+            if len(self.stack):
+                self.stack.push(-self.stack.pop())
+                self.show_stack()
+        elif text[:1] == '-':
+            self.txt.set_text(text[1:])
+        elif len(text) < MAX_LINE_LEN:
+            self.txt.set_text('-' + text)
+
+    def clear_all(self):
+        """ clear the entry line and the history, or the stack in RPN mode """
+        self.clear()
+        if self.rpn_mode:
+            self.stack.clear()
+            self.show_stack()
+        else:
+            self.history.clear()
+
+    def push_result(self, res):
+        """ show a result and make it M1, the previous one becomes M2 """
+        self.history.append(numformat(res))
+        values = variables.values
+        values[M2] = values[M1]
+        values[M1] = res
+
+    def menu_select(self, item):
+        """ a menu item was selected (see keymap.MenuAction): it opens a
+            submenu, runs its menu_ method or is inserted as text
+        """
+        if item in style.submenu_pages:
+            self.menu.show_submenu(item)
+            return
+        method = getattr(self, 'menu_' + item, None)
+        if method is not None:
+            method()
+        else:
+            self.insert_text(item)
+
+    def menu_stat(self):
+        """ toggle statistics mode, starting from no values """
+        self.stats_mode = not self.stats_mode
+        if self.stats_mode:
+            self.stats.clear()
+            self.show_msg('statistics on')
+        else:
+            self.show_msg('statistics off')
+
+    def show_stat(self, name, fn):
+        """ push a statistic of the values entered so far as a result, and on
+            the stack in RPN mode
+        """
+        try:
+            res = fn()
+            self.push_result(res)
+            if self.rpn_mode:
+                self.stack.push(res)
+                self.show_stack()
+            self.show_msg(name + ' of ' + str(len(self.stats)) + ' values')
+        except Exception as e:
+            self.show_err(e)
+
+    def menu_mean(self):
+        self.show_stat('mean', self.stats.mean)
+
+    def menu_sdev(self):
+        self.show_stat('std dev', self.stats.stddev)
+
+    def menu_sum(self):
+        self.show_stat('sum', self.stats.total)
+
+    def menu_frac(self):
+        """ toggle fraction mode: exact results shown as n/d """
+        self.fraction_mode = not self.fraction_mode
+        if self.fraction_mode:
+            self.show_msg('fractions on')
+        else:
+            self.decimal_variables()
+            self.show_msg('fractions off')
+
+    def decimal_variables(self):
+        """ after a mode is turned off: the ints of programmer mode become
+            DecimalNumber values, and so do the Fractions, unless fraction
+            mode is still on and they keep their exact value
+        """
+        values = variables.values
+        for i, value in enumerate(values):
+            if type(value) is int or (type(value) is Fraction and not self.fraction_mode):
+                values[i] = to_decimal(value)
+
+    def menu_deg(self):
+        """ switch the angles of sin, cos, tan, asin... between radians and degrees """
+        mathexpr.DEGREES = not mathexpr.DEGREES
+        self.show_status()
+        self.show_msg('degrees' if mathexpr.DEGREES else 'radians')
+
+    def menu_prog(self):
+        """ programmer mode: cycle through the widths, then off """
+        widths = programmer.WIDTHS
+        if self.int_width == widths[-1]:
+            self.int_width = 0
+            self.decimal_variables()
+            self.show_msg('programmer off')
+        else:
+            self.int_width = widths[widths.index(self.int_width) + 1] if self.int_width else widths[0]
+            self.show_msg(str(self.int_width) + ' bit, base ' + str(BASE))
+
+    def menu_base(self):
+        """ cycle through the bases of the results of programmer mode """
+        global BASE
+        bases = programmer.BASES
+        BASE = bases[(bases.index(BASE) + 1) % len(bases)]
+        self.show_msg('base ' + str(BASE))
+
+    def menu_factor(self):
+        """ show the prime factors of M1 in the history, M1 is unchanged """
+        try:
+            value = Fraction.from_decimal(variables.values[M1])
+            if value.denominator != 1 or value.numerator < 1:
+                raise RuntimeError('M1 is not an integer > 0')
+            factors = intmath.factorize(value.numerator)
+            text = intmath.format_factors(factors) if factors else '1'
+            if self.rpn_mode:
+                # the lines show the stack, which stays as it is
+                self.show_msg(text)
+            else:
+                self.history.append(text)
+                self.show_msg(str(sum(e for p, e in factors)) + ' prime factors')
+        except Exception as e:
+            self.show_err(e)
+
+    def show_cache_info(self):
+        """ show the counters of the function results cache (see
+            DecimalNumber.set_cache_size), on ENTER with an empty line
+        """
+        hits, misses, entries, size = DecimalNumber.cache_info()
+        self.show_msg('cache ' + str(entries) + '/' + str(size) +
+                      ' hits ' + str(hits) + ' misses ' + str(misses))
+
 
     def action(self, key, action, symbol):
         method = getattr(self, symbol, None)
@@ -410,16 +650,14 @@ class Calc:
             print('Unmatched key', key, symbol)
 
     def STORE(self, key, action):
-        """ Take the most recent result value (M1) and assign the value to one
-            of the user variable slots (M3 or M4)
+        """ Take the most recent result value (M1) and assign the value to the
+            variable slot bound to the macro key (M3 or M4)
         """
-        global M1, M2, M3, M4
         if action == keymap.LONGPRESS:
-            if key.symbol == "M3":
-                M3 = M1
-                self.show_msg('stored')
-            elif key.symbol == "M4":
-                M4 = M1
+            slot = self.key_slots.get(key.scancode)
+            if slot == M3 or slot == M4:
+                values = variables.values
+                values[slot] = values[M1]
                 self.show_msg('stored')
 
     def F17(self, keydown):
@@ -431,7 +669,13 @@ class Calc:
 
     def F19(self, keydown):
         if keydown:
-            self.current_line.set_text(self.current_line.get_text()[0:-1])
+            text = self.current_line.get_text()
+            if self.rpn_mode and text == '' and len(self.stack):
+                # backspace on an empty entry line drops x
+                self.stack.pop()
+                self.show_stack()
+            else:
+                self.current_line.set_text(text[0:-1])
 
     def pgdn(self):
         self.send_key(keymap.PGDN)
@@ -2,6 +2,12 @@
 # MIT License
 
 import sys
+from lru import LRUCache
+
+try:
+    from gc import mem_free as _mem_free    # MicroPython
+except ImportError:
+    _mem_free = None
 
 if sys.implementation.name == "cpython":        # micropython does not include 'typing' module
     from typing import Tuple
@@ -9,6 +15,359 @@ if sys.implementation.name == "micropython":    # Just in case...
     pass
 
 
+# Table of powers of ten: _POW10[k] == 10 ** k.
+# The same few exponents (around the scale and twice the scale) are needed by
+# almost every operation, so they are computed once instead of building a new
+# bigint each time. The table grows lazily up to _pow10_max entries; that limit
+# follows the scale (see DecimalNumber.set_scale) so memory use stays bounded.
+_POW10: list = [1]
+_pow10_max: int = 0
+
+def _pow10(k: int) -> int:
+    """Returns 10 ** k, using the table when possible."""
+    if k < len(_POW10):
+        return _POW10[k]
+    if k > _pow10_max:
+        return 10 ** k
+    p: int = _POW10[-1]
+    while len(_POW10) <= k:
+        p *= 10
+        _POW10.append(p)
+    return p
+
+# Integer roots. CPython has math.isqrt; elsewhere Newton's method starts from a
+# power of two just above the root, taken from the bit length, so it converges
+# from above in a few steps instead of being seeded digit by digit.
+if hasattr(1, "bit_length"):
+    def _bit_length(n: int) -> int:
+        return n.bit_length()
+else:
+    def _bit_length(n: int) -> int:
+        """An upper bound of the bit length, enough for a seed"""
+        return len("{:x}".format(n)) * 4
+
+try:
+    from math import isqrt as _isqrt
+except ImportError:
+    def _isqrt(n: int) -> int:
+        """floor(sqrt(n)) for an integer n >= 0"""
+        if n < 2:
+            return n
+        x: int = 1 << ((_bit_length(n) + 1) // 2)
+        while True:
+            y: int = (x + n // x) >> 1
+            if y >= x:
+                return x
+            x = y
+
+def _iroot(a: int, n: int) -> int:
+    """floor(a ** (1/n)) for integers a >= 0 and n >= 2"""
+    if n == 2 or a < 2:
+        return _isqrt(a)
+    x: int = 1 << -(-_bit_length(a) // n)   # 2**ceil(bits / n) >= the root
+    n1: int = n - 1
+    while True:
+        y: int = (n1 * x + a // x ** n1) // n
+        if y >= x:
+            return x
+        x = y
+
+# Constants are computed with binary splitting: a series is summed as a single
+# fraction T / Q by recursively halving its range of terms, so the work is done
+# in a few large multiplications instead of one long division per term.
+# Each function returns the constant * 10**digits as an integer.
+
+def _bs_chudnovsky(a: int, b: int) -> tuple:
+    """Binary splitting of the Chudnovsky series, terms a to b - 1. Returns (P, Q, T)."""
+    if b - a == 1:
+        if a == 0:
+            p = q = 1
+        else:
+            p = (6 * a - 5) * (2 * a - 1) * (6 * a - 1)
+            q = a * a * a * 10939058860032000    # 640320**3 / 24
+        t = p * (13591409 + 545140134 * a)
+        if a & 1:
+            t = -t
+        return p, q, t
+    m: int = (a + b) // 2
+    p1, q1, t1 = _bs_chudnovsky(a, m)
+    p2, q2, t2 = _bs_chudnovsky(m, b)
+    return p1 * p2, q1 * q2, q2 * t1 + p1 * t2
+
+def _pi_digits(digits: int) -> int:
+    """pi = 426880 * sqrt(10005) * Q / T ; each term adds about 14 digits."""
+    p, q, t = _bs_chudnovsky(0, digits // 14 + 2)
+    one: int = _pow10(digits)
+    return (426880 * _isqrt(10005 * one * one) * q) // t
+
+def _bs_e(a: int, b: int) -> tuple:
+    """Binary splitting of 1/(a+1) + 1/((a+1)(a+2)) + ... up to the term for b. Returns (P, Q)."""
+    if b - a == 1:
+        return 1, b
+    m: int = (a + b) // 2
+    p1, q1 = _bs_e(a, m)
+    p2, q2 = _bs_e(m, b)
+    return p1 * q2 + p2, q1 * q2
+
+def _e_digits(digits: int) -> int:
+    """e = 1 + 1/1! + 1/2! + ... ; the series is cut when n! exceeds 10**digits."""
+    one: int = _pow10(digits)
+    n: int = 1
+    f: int = 1
+    while f <= one:
+        n += 1
+        f *= n
+    p, q = _bs_e(0, n)
+    return one + (p * one) // q
+
+def _bs_atanh(a: int, b: int, x2: int) -> tuple:
+    """Binary splitting of atanh(1/x) * x = sum 1 / ((2k+1) * x**2k), terms a to b - 1.
+    Returns (Q, B, T)."""
+    if b - a == 1:
+        return (1 if a == 0 else x2), 2 * a + 1, 1
+    m: int = (a + b) // 2
+    q1, b1, t1 = _bs_atanh(a, m, x2)
+    q2, b2, t2 = _bs_atanh(m, b, x2)
+    return q1 * q2, b1 * b2, b2 * q2 * t1 + b1 * t2
+
+def _atanh_inv_digits(x: int, digits: int) -> int:
+    """atanh(1/x) * 10**digits for an integer x > 1."""
+    one: int = _pow10(digits)
+    terms: int = 1
+    p: int = x
+    while p <= one:     # each term is about x**2 times smaller than the previous one
+        p *= x * x
+        terms += 1
+    q, b, t = _bs_atanh(0, terms, x * x)
+    return (t * one) // (b * q * x)
+
+def _ln2_digits(digits: int) -> int:
+    """ln(2) = 18 atanh(1/26) - 2 atanh(1/4801) + 8 atanh(1/8749)"""
+    d: int = digits + 3
+    r: int = (18 * _atanh_inv_digits(26, d) - 2 * _atanh_inv_digits(4801, d)
+              + 8 * _atanh_inv_digits(8749, d))
+    return r // 1000
+
+def _ln10_digits(digits: int) -> int:
+    """ln(10) = 3 ln(2) + ln(5/4) = 3 ln(2) + 2 atanh(1/9)"""
+    d: int = digits + 2
+    return (3 * _ln2_digits(d) + 2 * _atanh_inv_digits(9, d)) // 100
+
+# Fixed point kernels for exp and ln. Values are integers scaled by 10**digits.
+
+EXP_HALVINGS = 8    # exp(r) is evaluated as exp(r / 2**8) ** (2**8)
+
+def _exp_fixed(x: int, digits: int) -> int:
+    """exp(x / 10**digits) * 10**digits"""
+    # Extra digits: each of the final squarings doubles the relative error.
+    guard: int = 4
+    d: int = digits + guard
+    one: int = _pow10(d)
+    x *= _pow10(guard)
+    ln2: int = DecimalNumber._constant_fixed("ln2", _ln2_digits, d)
+    k: int = (2 * x + ln2) // (2 * ln2)     # round(x / ln2)
+    r: int = x - k * ln2
+    # Taylor series of exp(r / 2**EXP_HALVINGS) ; the division is folded into the terms.
+    # The terms are computed on |r| (floor division of a negative term would never reach 0).
+    negative: bool = r < 0
+    if negative:
+        r = -r
+    div: int = one << EXP_HALVINGS
+    s: int = one
+    term: int = one
+    n: int = 1
+    while term != 0:
+        term = (term * r) // (div * n)
+        if negative and (n & 1):
+            s -= term
+        else:
+            s += term
+        n += 1
+    for i in range(EXP_HALVINGS):
+        s = (s * s) // one
+    if k >= 0:
+        s <<= k
+    else:
+        s >>= -k
+    return s // _pow10(guard)
+
+def _atanh_fixed(u: int, one: int) -> int:
+    """atanh(u / one) * one for small |u / one|"""
+    if u < 0:
+        return -_atanh_fixed(-u, one)
+    u2: int = (u * u) // one
+    s: int = u
+    t: int = u
+    n: int = 1
+    while t != 0:
+        t = (t * u2) // one
+        n += 2
+        s += t // n
+    return s
+
+# ln(i / 16) for i in LN_TABLE_FIRST..LN_TABLE_FIRST+12, computed for _ln_table_digits.
+LN_TABLE_FIRST = 12
+_ln_table: list = []
+_ln_table_digits: int = -1
+
+def _ln_table_for(digits: int) -> list:
+    global _ln_table, _ln_table_digits
+    if _ln_table_digits != digits:
+        one: int = _pow10(digits)
+        _ln_table = [2 * _atanh_fixed(((i - 16) * one) // (i + 16), one)
+                     for i in range(LN_TABLE_FIRST, LN_TABLE_FIRST + 13)]
+        _ln_table_digits = digits
+    return _ln_table
+
+def _ln_fixed(n: int, decimals: int, digits: int) -> int:
+    """ln(n / 10**decimals) * 10**digits for an integer n > 0"""
+    guard: int = 3
+    d: int = digits + guard
+    one: int = _pow10(d)
+    # n / 10**decimals = y * 10**e10 with y in [0.1, 1)
+    length: int = len(str(n))
+    e10: int = length - decimals
+    if d >= length:
+        y: int = n * _pow10(d - length)
+    else:
+        y: int = n // _pow10(length - d)
+    # y * 2**-k in [0.75, 1.5)
+    k: int = 0
+    limit: int = (3 * one) // 4
+    while y < limit:
+        y <<= 1
+        k += 1
+    # y = c * w with c = i/16 from the table and w close to 1
+    i: int = (16 * y + one // 2) // one
+    w: int = (16 * y) // i
+    s: int = 2 * _atanh_fixed(((w - one) * one) // (w + one), one)
+    s += _ln_table_for(d)[i - LN_TABLE_FIRST]
+    if e10 != 0:
+        s += e10 * DecimalNumber._constant_fixed("ln10", _ln10_digits, d)
+    if k != 0:
+        s -= k * DecimalNumber._constant_fixed("ln2", _ln2_digits, d)
+    return s // _pow10(guard)
+
+# Fixed point kernels for sin and cos.
+
+def _sincos_series(r: int, one: int) -> tuple:
+    """(sin, cos) of r / one for |r / one| <= π/4, both series summed in one loop.
+    The terms r**n / n! are shared: odd n go to sin and even n go to cos."""
+    negative: bool = r < 0
+    if negative:
+        r = -r
+    s: int = 0
+    c: int = one
+    term: int = one
+    n: int = 1
+    while term != 0:
+        term = (term * r) // (n * one)
+        if n & 1:
+            if n & 2:       # n = 3, 7, 11 ...
+                s -= term
+            else:           # n = 1, 5, 9 ...
+                s += term
+        else:
+            if n & 2:       # n = 2, 6, 10 ...
+                c -= term
+            else:           # n = 4, 8, 12 ...
+                c += term
+        n += 1
+    return (-s if negative else s), c
+
+def _sincos_quadrant(s: int, c: int, quadrant: int) -> tuple:
+    """(sin, cos) of r + quadrant * π/2, given (sin, cos) of r"""
+    quadrant %= 4
+    if quadrant == 0:
+        return s, c
+    elif quadrant == 1:
+        return c, -s
+    elif quadrant == 2:
+        return -s, -c
+    return -c, s
+
+# Fixed point kernels for the inverse trigonometric functions.
+
+def _atan_fixed(x: int, one: int) -> int:
+    """atan(x / one) * one for 0 <= x <= one
+    The argument is halved twice with atan(x) = 2 * atan(x / (1 + sqrt(1 + x²))),
+    so x <= tan(π/16) and the series x - x³/3 + x⁵/5 ... converges quickly."""
+    for i in range(2):
+        x = (x * one) // (one + _isqrt(one * one + x * x))
+    x2: int = (x * x) // one
+    s: int = x
+    t: int = x
+    n: int = 1
+    while t != 0:
+        t = (t * x2) // one
+        n += 2
+        if n & 2:       # n = 3, 7, 11 ...
+            s -= t // n
+        else:           # n = 5, 9, 13 ...
+            s += t // n
+    return 4 * s
+
+def _atan2_fixed(y: int, x: int, digits: int) -> int:
+    """atan2(y, x) * 10**digits ; y and x are integers with the same scaling.
+    The smaller of |y| and |x| is divided by the larger, so the quotient is at
+    most 1 and atan(t) = π/2 - atan(1/t) covers the rest. (0, 0) is not valid."""
+    one: int = _pow10(digits)
+    pi: int = DecimalNumber._constant_fixed("pi", _pi_digits, digits)
+    ay: int = y if y >= 0 else -y
+    ax: int = x if x >= 0 else -x
+    if ay <= ax:
+        a: int = _atan_fixed((ay * one) // ax, one)
+    else:
+        a: int = pi // 2 - _atan_fixed((ax * one) // ay, one)
+    if x < 0:
+        a = pi - a
+    return a if y >= 0 else -a
+
+# Deferred normalization (see DecimalNumber.set_deferred). _round_at is the
+# number of decimals that the operations round to: the scale, plus
+# DEFERRED_GUARD in deferred mode. They are module globals rather than class
+# attributes because they change often, and on CPython every change to a class
+# attribute throws away the cached lookups of all its attributes.
+_deferred: bool = False
+_round_at: int = 0
+# 10 ** (_round_at + INTEGER_DIGITS): mantissas of the current scale are below it
+_max_mantissa: int = 0
+
+# Results of exp, ln, sin, cos, tan, atan and square_root, keyed on
+# (function, signed mantissa, decimals, scale): re-running an expression with
+# ln(2) or sin(30) does not sum the series again. It holds copies, so callers
+# may modify what they get (see _cache_put and DecimalNumber.set_cache_size).
+_cache: LRUCache = LRUCache(32)
+
+def _cache_get(key: tuple):
+    """Returns a copy of the cached result for key, or None."""
+    r = _cache.get(key)
+    if r is None:
+        return None
+    if isinstance(r, tuple):
+        return tuple(n.clone() for n in r)
+    return r.clone()
+
+def _cache_put(key: tuple, value):
+    """Stores a copy of value (a DecimalNumber or a tuple of them) and returns value.
+    When the free memory is low (MicroPython), the cache is emptied first."""
+    if _cache.size > 0:
+        if _mem_free is not None and _mem_free() < DecimalNumber.CACHE_MIN_FREE:
+            _cache.clear()
+        if isinstance(value, tuple):
+            _cache.put(key, tuple(n.clone() for n in value))
+        else:
+            _cache.put(key, value.clone())
+    return value
+
+def _set_pow10_max(scale: int) -> None:
+    """Sets the table limit for the given scale, trimming it when the scale shrinks."""
+    global _pow10_max
+    _pow10_max = 2 * scale + DecimalNumber.INTEGER_DIGITS + 8
+    if len(_POW10) > _pow10_max + 1:
+        del _POW10[_pow10_max + 1:]
+
+
 class DecimalNumber:
     """DecimalNumber is a class for decimal floating point arithmetic with arbitrary precision."""
     VERSION = (1, 0, 0)
@@ -17,13 +376,38 @@ class DecimalNumber:
     DECIMAL_SEP: str = "."
     THOUSANDS_SEP: str = ","
     USE_THOUSANDS_SEP: bool = False
-    PI_NUMBER: int = 31415926535897932384626433832795028841971693993751058209749445923078164062862089986280348253421170679
-    PI_SCALE: int = 100
-    E_NUMBER: int = 27182818284590452353602874713526624977572470936999595749669676277240766303535475945713821785251664274
-    E_SCALE: int = 100
-    LN2_NUMBER: int = 6931471805599453094172321214581765680755001343602552541206800094933936219696947156058633269964186875
-    LN2_SCALE: int = 100
+    PI_NUMBER: int = 3141592653589793238462643383279502884197169399375105820974944592307816406286208998628034825342117067982148086
+    PI_SCALE: int = 108
+    E_NUMBER: int = 2718281828459045235360287471352662497757247093699959574966967627724076630353547594571382178525166427427466391
+    E_SCALE: int = 108
+    LN2_NUMBER: int = 693147180559945309417232121458176568075500134360255254120680009493393621969694715605863326996418687542001481
+    LN2_SCALE: int = 108
+    DEFERRED_GUARD: int = 4
+    # A mantissa keeps at most scale + INTEGER_DIGITS significant digits. Values
+    # below 10**INTEGER_DIGITS are plain fixed point numbers with 'scale' decimals;
+    # larger ones are rounded to that many digits and _num_decimals becomes
+    # negative: it is then a base-10 exponent, value = _number * 10**-_num_decimals.
+    # So the cost of the operations is bounded by the precision, not the magnitude.
+    INTEGER_DIGITS: int = 18
+    # to_string_max_length: numbers below 1 are shown in scientific notation when
+    # the fixed notation would show fewer significant digits than this.
+    SCI_MIN_DIGITS: int = 6
+    # Parsing: exponents (1.5e300) have at most this many digits.
+    MAX_EXPONENT_DIGITS: int = 4
+    # Results cache (see set_cache_size): it is emptied when fewer bytes are free.
+    CACHE_MIN_FREE: int = 16384
     _scale: int = DEFAULT_SCALE
+    # Constants cache (see _constant)
+    _constants: dict = {
+        "pi": (PI_SCALE, PI_NUMBER),
+        "e": (E_SCALE, E_NUMBER),
+        "ln2": (LN2_SCALE, LN2_NUMBER),
+        "ln10": (-1, 0),
+    }
+    _constants_by_scale: dict = {}
+
+    # No per-instance dict: each number is just these three references.
+    __slots__ = ("_number", "_num_decimals", "_is_positive")
 
     def __init__(self, number=0, decimals: int = 0) -> None:
         """Initialization of a DecimalNumber.
@@ -41,167 +425,140 @@ class DecimalNumber:
             else:
                 raise DecimalNumberExceptionMathDomainError(
                     "__init__: the number of decimals must be positive")
-            self._reduce_to_scale()
+            if decimals != 0:       # an integer needs no rounding
+                self._reduce_to_scale()
         elif isinstance(number, str):
             self.copy_from(DecimalNumber._from_string(number))
         else:
             raise DecimalNumberExceptionBadInit(
                 "Only 'int' or 'str' instances are allowed for initialization")
 
-    @classmethod
-    def pi(cls) -> "DecimalNumber":
-        """Calculation of PI using the very fast algorithm present on the
-        documentation of the module "decimal" of the Python Standard Library:
-        https://docs.python.org/3/library/decimal.html#recipes
+    @staticmethod
+    def _constant_fixed(name: str, compute, digits: int) -> int:
+        """Returns the constant 'name' * 10**digits (truncated) as an integer,
+        computing it if the cache is not precise enough (see _constant)."""
+        d, number = DecimalNumber._constants[name]
+        if d < digits:
+            d = digits + 8      # guard digits
+            number = compute(d)
+            DecimalNumber._constants[name] = (d, number)
+        return number // _pow10(d - digits)
+
+    @staticmethod
+    def _constant(name: str, compute, scale: int) -> "DecimalNumber":
+        """Returns the constant 'name' at the given scale.
+        _constants keeps the most precise value computed so far for each constant
+        as (digits, integer), integer being the constant * 10**digits. A lower
+        scale is served by rounding that value, so each constant is only computed
+        again when a scale above every previous one is requested. The rounded
+        value is also kept per scale, since the same few scales are used over and over.
         """
-        # If it is precalculated
-        if DecimalNumber.PI_SCALE >= DecimalNumber.get_scale():
-            s: DecimalNumber = DecimalNumber(DecimalNumber.PI_NUMBER, DecimalNumber.PI_SCALE)
-        else:
-            # Calculates PI
-            scale: int = DecimalNumber.get_scale()
-            # extra digits for intermediate steps
-            DecimalNumber.set_scale(scale + 4)
-            lasts = DecimalNumber(0)
-            t = DecimalNumber(3)
-            s = DecimalNumber(3)
-            n = DecimalNumber(1)
-            na = DecimalNumber(0)
-            d = DecimalNumber(0)
-            da = DecimalNumber(24)
-            eight = DecimalNumber(8)
-            thirtytwo = DecimalNumber(32)
-            while s != lasts:
-                lasts.copy_from(s)
-                n += na
-                na += eight
-                d += da
-                da += thirtytwo
-                t = (t * n) / d
-                s += t
-            DecimalNumber.set_scale(scale)
-            # Stores the calculated PI
-            DecimalNumber.PI_NUMBER = (+s)._number  # + adjusts to the scale
-            DecimalNumber.PI_SCALE = (+s)._num_decimals
-        return +s
+        key = (name, scale)
+        n = DecimalNumber._constants_by_scale.get(key)
+        if n is None:
+            digits, number = DecimalNumber._constants[name]
+            if digits <= scale:
+                # a value truncated to the scale can't be rounded to it
+                digits = scale + 8      # guard digits
+                number = compute(digits)
+                DecimalNumber._constants[name] = (digits, number)
+            n = DecimalNumber._new()._set(number, digits, scale)   # rounds to the scale
+            DecimalNumber._constants_by_scale[key] = n
+        return n.clone()
 
     @classmethod
-    def e(cls) -> "DecimalNumber":
-        """Calculation of e.
-        It uses the Taylor series:
-            e = 1/0! + 1/1! + 1/2! + 1/3! + ... + 1/n!
+    def pi(cls, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Returns PI. It is calculated with the Chudnovsky series (see _pi_digits)
+        when the scale is above every value computed so far.
         """
-        # If it is precalculated
-        if DecimalNumber.E_SCALE >= DecimalNumber.get_scale():
-            e: DecimalNumber = DecimalNumber(DecimalNumber.E_NUMBER, DecimalNumber.E_SCALE)
-        else:
-            scale: int = DecimalNumber.get_scale()
-            # extra digits for intermediate steps
-            DecimalNumber.set_scale(scale + 4)
-
-            i = DecimalNumber(0)
-            f = DecimalNumber(1)
-            e = DecimalNumber(1)
-            e2 = DecimalNumber(0)
-            one = DecimalNumber(1)
-            while e2 != e:
-                e2.copy_from(e)
-                i += one		# counter
-                f *= i
-                t = one / f
-                e += t
-
-            DecimalNumber.set_scale(scale)
-            # Stores the calculated E
-            DecimalNumber.E_NUMBER = (+e)._number  # + adjusts to the scale
-            DecimalNumber.E_SCALE = (+e)._num_decimals
-        return +e
+        return DecimalNumber._constant("pi", _pi_digits, DecimalNumber._scale_of(context))
 
     @classmethod
-    def ln2(cls) -> "DecimalNumber":
-        """Calculation of ln(2).
-        ln(2) = -ln(1/2) = -ln(1 - 1/2)
-        It uses the Taylor series:
-            ln(1-x) = -x -x²/2 - x³/3 ...
-            ln(2) = x + x²/2 + x³/3 ... for x = 1/2
+    def e(cls, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Returns e. It is calculated with the series e = 1/0! + 1/1! + 1/2! + ...
+        (see _e_digits) when the scale is above every value computed so far.
         """
-        # If it is precalculated
-        if DecimalNumber.LN2_SCALE >= DecimalNumber.get_scale():
-            e: DecimalNumber =  DecimalNumber(DecimalNumber.LN2_NUMBER, DecimalNumber.LN2_SCALE)
-        else:
-            scale: int = DecimalNumber.get_scale()
-            DecimalNumber.set_scale(scale + 4) # extra digits for intermediate steps
-
-            i = DecimalNumber(0)    # counter
-            half = DecimalNumber(5, 1) # 0.5
-            x = DecimalNumber(1)
-            one = DecimalNumber(1)
-            e = DecimalNumber(0)
-            e2 = DecimalNumber(1)
-            while e2 != e:
-                e2.copy_from(e)
-                i += one
-                x *= half
-                e += x / i
-
-            DecimalNumber.set_scale(scale)
-            # Stores the calculated LN2
-            DecimalNumber.LN2_NUMBER = (+e)._number  # + adjusts to the scale
-            DecimalNumber.LN2_SCALE = (+e)._num_decimals
-        return +e
-
-    def exp(self, inc_scale: bool = True) -> "DecimalNumber":
-        """Calculates exp(n)
-        Works for any x, but for speed, it should have |x| < 1.
-        For an arbitrary number, to guarantee that |x| < 1, it uses:
-            exp(x) = exp(x - m * log(2)) * 2 ^ m ; where m = floor(x / log(2))
-
-        Scale is increased if 'inc_false' is True.
+        return DecimalNumber._constant("e", _e_digits, DecimalNumber._scale_of(context))
+
+    @classmethod
+    def ln2(cls, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Returns ln(2). It is calculated with a Machin-like formula (see _ln2_digits)
+        when the scale is above every value computed so far.
         """
-        scale = DecimalNumber.get_scale()
-        # Calculating the necessary extra scale:
-        extra = (abs(self) / DecimalNumber("2.3")).to_int_round() + 10
-        DecimalNumber.set_scale(scale + extra)
-        if abs(self) <= 1:
-            r = DecimalNumber._exp_lt_1(self, inc_scale)
-        else:
-            m = (self / DecimalNumber.ln2()).to_int_truncate()
-            r = DecimalNumber._exp_lt_1(self - m * DecimalNumber.ln2()) * (2 ** m)
+        return DecimalNumber._constant("ln2", _ln2_digits, DecimalNumber._scale_of(context))
 
-        DecimalNumber.set_scale(scale)
-        return +r
+    @classmethod
+    def ln10(cls, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Returns ln(10) = 3 * ln(2) + 2 * atanh(1/9)"""
+        return DecimalNumber._constant("ln10", _ln10_digits, DecimalNumber._scale_of(context))
+
+    def _cache_key(self, name: str, scale: int) -> tuple:
+        return (name, self._number if self._is_positive else -self._number, self._num_decimals, scale)
 
     @staticmethod
-    def _exp_lt_1(n: "DecimalNumber", inc_scale: bool = True) -> "DecimalNumber":
-        """ Auxiliary function to calculates exp(n)
-        Expects |n| < 1 to converge rapidly
-        """
-        if n == 1:
-            e = DecimalNumber.e()
-        elif n == -1:
-            e = 1 / DecimalNumber.e()
+    def set_cache_size(size: int) -> None:
+        """Sets the number of results of exp, ln, sin, cos, tan, atan and
+        square_root that are kept (0 disables the cache)."""
+        _cache.resize(size)
+
+    @staticmethod
+    def cache_info() -> tuple:
+        """Returns (hits, misses, entries, size) of the results cache."""
+        return (_cache.hits, _cache.misses, len(_cache), _cache.size)
+
+    @staticmethod
+    def cache_clear() -> None:
+        """Empties the results cache and resets its counters."""
+        _cache.clear()
+        _cache.hits = 0
+        _cache.misses = 0
+
+    def _to_fixed(self, digits: int) -> int:
+        """Returns self as a signed fixed point integer with 'digits' decimals
+        (self * 10**digits, truncated)."""
+        if digits >= self._num_decimals:
+            n: int = self._number * _pow10(digits - self._num_decimals)
         else:
-            i = DecimalNumber(0)
-            x = DecimalNumber(1)
-            f = DecimalNumber(1)
-            e = DecimalNumber(1)
-            e2 = DecimalNumber(0)
-            one = DecimalNumber(1)
-            while e2 != e:
-                e2.copy_from(e)
-                i += one		# counter
-                x *= n
-                f *= i
-                t = x / f
-                e += t
-
-        # if inc_scale:
-        #     DecimalNumber.set_scale(scale)
-        return +e
-
-    def ln(self) -> "DecimalNumber":
-        """Calculates ln(n)
-        Newton's method is used to solve: e**a - x = 0 ; a = ln(x)
+            n: int = self._number // _pow10(self._num_decimals - digits)
+        return n if self._is_positive else -n
+
+    def exp(self, inc_scale: bool = True, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Calculates exp(x)
+        The argument is reduced with powers of two:
+            exp(x) = exp(r) * 2**k ; where k = round(x / ln(2)) and |r| <= ln(2) / 2
+            exp(r) = exp(r / 2**EXP_HALVINGS) ** (2**EXP_HALVINGS)
+        so the Taylor series only needs a few terms. It runs on fixed point
+        integers (see _exp_fixed).
+        Beyond INTEGER_DIGITS integer digits the result takes the exponent form:
+            exp(x) = exp(r) * 10**q ; where q = floor(x / ln(10))
+        'inc_scale' is kept for compatibility and ignored.
+        """
+        scale: int = DecimalNumber._scale_of(context)
+        key: tuple = self._cache_key("exp", scale)
+        r = _cache_get(key)
+        if r is not None:
+            return r
+        # exp(x) has about x * log10(e) integer digits that also need precision
+        integer_digits: int = (self._to_fixed(0) * 4343) // 10000 + 1
+        if integer_digits > DecimalNumber.INTEGER_DIGITS:
+            digits: int = scale + DecimalNumber.INTEGER_DIGITS + 4
+            e: int = len(str(integer_digits))   # digits of q, lost in the reduction
+            x: int = self._to_fixed(digits + e)
+            ln10: int = DecimalNumber._constant_fixed("ln10", _ln10_digits, digits + e)
+            q: int = x // ln10
+            x = (x - q * ln10) // _pow10(e)
+            return _cache_put(key, DecimalNumber._new()._set(_exp_fixed(x, digits), digits - q, scale))
+        digits: int = scale + 10 + (integer_digits if integer_digits > 0 else 0)
+        return _cache_put(key, DecimalNumber._new()._set(_exp_fixed(self._to_fixed(digits), digits), digits, scale))
+
+    def ln(self, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Calculates ln(x)
+        The argument is reduced with powers of ten and two, and then with a
+        table of logarithms:
+            x = y * 10**d * 2**k * c ; c = i/16 for i in 12..24 ; |y - 1| <= 1/32
+            ln(x) = d * ln(10) + k * ln(2) + ln(c) + ln(y)
+        ln(y) = 2 * atanh((y - 1) / (y + 1)) converges after a few terms.
+        No exp() is needed (see _ln_fixed).
         """
         if self == 1:
             return DecimalNumber(0)
@@ -209,297 +566,181 @@ class DecimalNumber:
             raise DecimalNumberExceptionMathDomainError("ln(0) = -Infinite")
         if self < 0:
             raise DecimalNumberExceptionMathDomainError("ln(x) exists for x > 0")
-        n = self
-        scale: int = DecimalNumber.get_scale()
-
-        # Estimate first value
-        DecimalNumber.set_scale(10) # Low scale for this is enough
-        e = DecimalNumber.e()
-        y0 = DecimalNumber(0)
-        y1 = DecimalNumber(1)
-        one = DecimalNumber(1)
-        p: DecimalNumber = e.clone()
-        while p < n:
-            y1 += one
-            p *= e
-
-        DecimalNumber.set_scale(scale) # Restores scale
-        DecimalNumber.set_scale(DecimalNumber.get_scale() + 10) # extra digits for intermediate steps
-        two = DecimalNumber(2)
-        while y0 != y1:
-            y0.copy_from(y1)
-            y1 = y0 + two * ((n - y0.exp(False)) / (n + y0.exp(False)))
-
-        DecimalNumber.set_scale(scale)
-        return +y1
-
-    def sin(self) -> "DecimalNumber":
-        """Calculates sin(x). x = radians
-        It uses the Taylor series: sin(x) = x - x³/3! + x⁵/5! - x⁷/7! ...
+        scale: int = DecimalNumber._scale_of(context)
+        key: tuple = self._cache_key("ln", scale)
+        r = _cache_get(key)
+        if r is not None:
+            return r
+        digits: int = scale + 10
+        return _cache_put(key, DecimalNumber._new()._set(
+            _ln_fixed(self._number, self._num_decimals, digits), digits, scale))
+
+    def _sincos_fixed(self, digits: int, degrees: bool) -> tuple:
+        """Returns (sin(self), cos(self)) as fixed point integers with 'digits' decimals.
+        Radians are reduced modulo π/2 using π with enough digits for the size of
+        the argument. Degrees are reduced modulo 90 exactly, as decimal integers,
+        so multiples of 90° give exact results.
         """
-        x = self.clone()
-        scale: int = DecimalNumber.get_scale()
-        DecimalNumber.set_scale(scale + 4) # extra digits for intermediate steps
-
-        negative_radians: bool = (x < 0)
-        if negative_radians:
-            x = -x
-        # Calculates x mod 2π
-        pi = DecimalNumber.pi()
-        f: int = (x / (pi * 2)).to_int_truncate()
-        if f > 0:
-            x -= f * 2 * pi
-
-        # Determines the quadrant and reduces the range of x to 0 - π/2
-        # sin(-x) = -sin(x) ; cos(-x) = cos(x) ; tan(-x) = -tan(x)
-        half_pi = pi / 2
-        r = half_pi.clone()
-        quadrant: int = 1
-        while x > r:
-            r += half_pi
-            quadrant += 1
-
-        if quadrant == 2:
-            x = pi - x
-        elif quadrant == 3:
-            x = x - pi
-        elif quadrant == 4:
-            x = 2 * pi - x
-
-        i = DecimalNumber(1)    # counter
-        two = DecimalNumber(2)
-        n = x.clone()
-        d = DecimalNumber(1)
-        s = DecimalNumber(1)
-        e = n.clone()
-        e2 = DecimalNumber(0)
-        while e2 != e:
-            e2.copy_from(e)
-            i += two
-            n *= x * x
-            d *= i * (i - 1)
-            s = -s
-            e += (n * s) / d
-
-        if quadrant > 2:
-            e = -e
-        if negative_radians:
-            e = -e
-
-        DecimalNumber.set_scale(scale)
-        return +e
-
-    def cos(self) -> "DecimalNumber":
-        """Calculates cos(x). x = radians
-        It uses the Taylor series: cos(x) = 1 - x²/2! + x⁴/4! - x⁶/6! ...
+        one: int = _pow10(digits)
+        n: int = self._number if self._is_positive else -self._number
+        if degrees:
+            decimals: int = self._num_decimals
+            if decimals < 0:
+                # exponent form: an integer, only its value modulo 360 matters
+                n = n * pow(10, -decimals, 360) % 360
+                decimals = 0
+            unit: int = 90 * _pow10(decimals)
+            quadrant, rem = divmod(n, unit)
+            if 2 * rem > unit:
+                quadrant += 1
+                rem -= unit
+            if rem == 0:
+                return _sincos_quadrant(0, one, quadrant)
+            pi: int = DecimalNumber._constant_fixed("pi", _pi_digits, digits)
+            return _sincos_quadrant(*_sincos_series((rem * pi) // (2 * unit), one), quadrant)
+        # the digits of the integer part are lost in the reduction, so π needs them too
+        extra: int = len(str(self._number)) - self._num_decimals
+        if extra < 0:
+            extra = 0
+        d: int = digits + extra
+        x: int = self._to_fixed(d)
+        pi: int = DecimalNumber._constant_fixed("pi", _pi_digits, d)
+        quadrant: int = (4 * x + pi) // (2 * pi)      # round(x / (π/2))
+        r: int = (2 * x - quadrant * pi) // (2 * _pow10(extra))
+        return _sincos_quadrant(*_sincos_series(r, one), quadrant)
+
+    def sincos(self, degrees: bool = False, context: "DecimalContext" = None) -> tuple:
+        """Calculates (sin(x), cos(x)) in one pass. x = radians, or degrees if 'degrees' is True
+        The argument is reduced to |r| <= π/4 and the quadrant, and then both
+        Taylor series are summed in the same loop (see _sincos_series):
+            sin(r) = r - r³/3! + r⁵/5! ... ; cos(r) = 1 - r²/2! + r⁴/4! ...
         """
-        x = self.clone()
-        scale: int = DecimalNumber.get_scale()
-        DecimalNumber.set_scale(scale + 4) # extra digits for intermediate steps
-
-        if (x < 0): # cos(-x) = cos(x)
-            x = -x
-
-        # Calculates x mod 2π
-        pi = DecimalNumber.pi()
-        f: int = (x / (pi * 2)).to_int_truncate()
-        if f > 0:
-            x -= f * 2 * pi
-
-        # Determines the quadrant and reduces the range of x to 0 - π/2
-        half_pi = pi / 2
-        r = half_pi.clone()
-        quadrant: int = 1
-        while x > r:
-            r += half_pi
-            quadrant += 1
-
-        if quadrant == 2:
-            x = pi - x
-        elif quadrant == 3:
-            x = x - pi
-        elif quadrant == 4:
-            x = 2 * pi - x
-
-        i = DecimalNumber(1)    # counter
-        two = DecimalNumber(2)
-        n = DecimalNumber(1)
-        d = DecimalNumber(1)
-        s = DecimalNumber(1)
-        e = n.clone()
-        e2 = DecimalNumber(0)
-        while e2 != e:
-            e2.copy_from(e)
-            n *= x * x
-            d *= i * (i + 1)
-            i += two
-            s = -s
-            e += (n * s) / d
-
-        if quadrant == 2 or quadrant == 3:
-            e = -e
-
-        DecimalNumber.set_scale(scale)
-        return +e
-
-    def tan(self) -> "DecimalNumber":
-        """Calculates tan(x) = sin(x) / cos(x). x = radians """
-        x = self.clone()
-
-        # Calculates x mod 2π
-        pi = DecimalNumber.pi()
-        f: int = (x / (pi * 2)).to_int_truncate()
-        if f > 0:
-            x -= f * 2 * pi
-
-        half_pi = pi / 2
-        three_halves_pi = (3 * pi) / 2
-        # Determines the quadrant
-        r = half_pi.clone()
-        quadrant: int = 1
-        while x > r:
-            r += half_pi
-            quadrant += 1
-
+        scale: int = DecimalNumber._scale_of(context)
+        key: tuple = self._cache_key("sincosd" if degrees else "sincos", scale)
+        r = _cache_get(key)
+        if r is not None:
+            return r
+        digits: int = scale + 6
+        s, c = self._sincos_fixed(digits, degrees)
+        new = DecimalNumber._new
+        return _cache_put(key, (new()._set(s, digits, scale), new()._set(c, digits, scale)))
+
+    def sin(self, degrees: bool = False, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Calculates sin(x). x = radians, or degrees if 'degrees' is True (see sincos)"""
+        return self.sincos(degrees, context)[0]
+
+    def cos(self, degrees: bool = False, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Calculates cos(x). x = radians, or degrees if 'degrees' is True (see sincos)"""
+        return self.sincos(degrees, context)[1]
+
+    def tan(self, degrees: bool = False, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Calculates tan(x) = sin(x) / cos(x). x = radians, or degrees if 'degrees' is True
+        sin and cos come from a single evaluation (see sincos)."""
+        scale: int = DecimalNumber._scale_of(context)
+        key: tuple = self._cache_key("tand" if degrees else "tan", scale)
+        r = _cache_get(key)
+        if r is not None:
+            return r
+        digits: int = scale + 6
+        s, c = self._sincos_fixed(digits, degrees)
+        # Near the poles tan(x) is large and cos(x) has leading zeros that need
+        # extra precision: evaluate again with twice their number.
+        lost: int = digits - len(str(abs(c)))
+        if c != 0 and lost > 0:
+            digits += 2 * lost
+            s, c = self._sincos_fixed(digits, degrees)
         # tan(x) = sin(x) / cos(x) ; if cos(x) == 0  =>  tan(x) = ∞
-
-        if self == half_pi or self == three_halves_pi:
+        if c == 0:
             raise DecimalNumberExceptionDivisionByZeroError("tan(x) = ±Infinite")
-        else:
-            scale: int = DecimalNumber.get_scale()
-            DecimalNumber.set_scale(scale + 4)
-            s = x.sin()
-            c = x.cos()
-            if c == 0:
-                DecimalNumber.set_scale(scale)
-                raise DecimalNumberExceptionDivisionByZeroError("tan(x) = ±Infinite")
-            else:
-                t = s / c
-                DecimalNumber.set_scale(scale)
-                return +t
+        return _cache_put(key, DecimalNumber._new()._set((s * _pow10(digits)) // c, digits, scale))
+
+    @staticmethod
+    def polar_to_rect(r: "DecimalNumber", theta: "DecimalNumber", degrees: bool = False,
+                      context: "DecimalContext" = None) -> tuple:
+        """Converts polar coordinates (r, θ) to rectangular (x, y) = (r cos θ, r sin θ)"""
+        scale: int = DecimalNumber._scale_of(context)
+        digits: int = scale + 6
+        s, c = theta._sincos_fixed(digits, degrees)
+        rf: int = r._to_fixed(digits)
+        one: int = _pow10(digits)
+        new = DecimalNumber._new
+        return new()._set((rf * c) // one, digits, scale), new()._set((rf * s) // one, digits, scale)
 
-    def asin(self) -> "DecimalNumber":
+    @staticmethod
+    def rect_to_polar(x: "DecimalNumber", y: "DecimalNumber", context: "DecimalContext" = None) -> tuple:
+        """Converts rectangular coordinates (x, y) to polar (r, θ), θ in radians"""
+        scale: int = DecimalNumber._scale_of(context)
+        digits: int = scale + 6
+        xf: int = x._to_fixed(digits)
+        yf: int = y._to_fixed(digits)
+        r = DecimalNumber._new()._set(_isqrt(xf * xf + yf * yf), digits, scale)
+        return r, DecimalNumber.atan2(y, x, context)
+
+    def asin(self, context: "DecimalContext" = None) -> "DecimalNumber":
         """Calculates asin(x)
-        It uses the Taylor series: arcsin(x) = x + 3x³/6 + 15x⁵/336 + ...
-        It converges very slowly for |x| near 1. To avoid values near 1:
-        If |n| between 0 and 0.707: arcsin(x) is calculated using the series.
-        if |n| between 0.707 and 1: arcsin(x) is calculated as pi/2 - arcsin( sqrt(1 - x²) )
-        This guarantees arcsin(x) using series with x <= 0.707 ; (sqrt(1/2)).
+        It uses: asin(x) = atan2(x, sqrt(1 - x²))
+        1 - x² is exact in fixed point, so there is no loss of precision for |x| near 1
+        (see _atan2_fixed).
         """
         if self >= -1 and self <= 1:
-            if self == -1:
-                return -(DecimalNumber.pi() / 2)
-            elif self == 1:
-                return (DecimalNumber.pi() / 2)
-            elif self == 0:
-                return DecimalNumber(0)
-
-            scale: int = DecimalNumber.get_scale()
-            DecimalNumber.set_scale(DecimalNumber.get_scale() + 4) # extra digits for intermediate steps
-
-            trick: bool = False
-            if abs(self) > DecimalNumber("0.707"):
-                trick = True
-                x = (1 - self * self).square_root()
-            else:
-                x = self.clone()
-
-            i = DecimalNumber(1)    # counter
-            one = DecimalNumber(1)
-            two = DecimalNumber(2)
-            four = DecimalNumber(4)
-            n = DecimalNumber(1)
-            d = DecimalNumber(1)
-            n2 = x.clone()
-            e = x.clone()
-            e2 = DecimalNumber(0)
-            counter: int = 0
-            while e2 != e:
-                e2.copy_from(e)
-                n *= i
-                i += two
-                d *= i - one
-                n2 *= x * x
-                e += (n * n2) / (d * i)
-
-            if trick:
-                if self._is_positive:
-                    e = DecimalNumber.pi() / 2 - e
-                else:
-                    e = e - DecimalNumber.pi() / 2
-
-            DecimalNumber.set_scale(scale)
-            return +e
+            scale: int = DecimalNumber._scale_of(context)
+            digits: int = scale + 6
+            x: int = self._to_fixed(digits)
+            one: int = _pow10(digits)
+            c: int = _isqrt(one * one - x * x)
+            return DecimalNumber._new()._set(_atan2_fixed(x, c, digits), digits, scale)
         else:
             raise DecimalNumberExceptionMathDomainError("asin(x) admits -1 <= x <= 1 only")
 
-    def acos(self) -> "DecimalNumber":
+    def acos(self, context: "DecimalContext" = None) -> "DecimalNumber":
         """Calculates acos(x)
-        It uses the equivalence: acos(x) = π/2 - asin(x)
+        It uses: acos(x) = atan2(sqrt(1 - x²), x)
         """
         if self >= -1 and self <= 1:
-            scale: int = DecimalNumber.get_scale()
-            DecimalNumber.set_scale(DecimalNumber.get_scale() + 4) # extra digits for intermediate steps
-
-            a = (DecimalNumber.pi() / 2) - self.asin()
-
-            DecimalNumber.set_scale(scale)
-            return +a
+            scale: int = DecimalNumber._scale_of(context)
+            digits: int = scale + 6
+            x: int = self._to_fixed(digits)
+            one: int = _pow10(digits)
+            c: int = _isqrt(one * one - x * x)
+            return DecimalNumber._new()._set(_atan2_fixed(c, x, digits), digits, scale)
         else:
             raise DecimalNumberExceptionMathDomainError("acos(x) admits -1 <= x <= 1 only")
 
-    def atan(self) -> "DecimalNumber":
+    def atan(self, context: "DecimalContext" = None) -> "DecimalNumber":
         """Calculates atan(x)
-        It uses: atan(x) = asin( x / sqrt(1 + x²) )
+        It uses: atan(x) = atan2(x, 1) (see _atan2_fixed)
         """
-        scale: int = DecimalNumber.get_scale()
-        DecimalNumber.set_scale(DecimalNumber.get_scale() + 4) # extra digits for intermediate steps
-        one = DecimalNumber(1)
-        v = self / (one + self * self).square_root()
-        a = v.asin()
-
-        DecimalNumber.set_scale(scale)
-        return +a
+        scale: int = DecimalNumber._scale_of(context)
+        key: tuple = self._cache_key("atan", scale)
+        r = _cache_get(key)
+        if r is not None:
+            return r
+        digits: int = scale + 6
+        a: int = _atan2_fixed(self._to_fixed(digits), _pow10(digits), digits)
+        return _cache_put(key, DecimalNumber._new()._set(a, digits, scale))
 
     @staticmethod
-    def atan2(y: "DecimalNumber", x: "DecimalNumber") -> "DecimalNumber":
+    def atan2(y: "DecimalNumber", x: "DecimalNumber", context: "DecimalContext" = None) -> "DecimalNumber":
         """Calculates atan2(y, x), 2-argument arctangent
         It uses:
-            if x > 0:   atan(y/x)
-            if x < 0:
-                        if y >= 0:  atan(y/x) + pi
-                        if y < 0:   atan(y/x) - pi
-            if x = 0:
-                        if y > 0:   +pi/2
-                        if y < 0:   -pi/2
-                        if y = 0:   undefined
+            if |y| <= |x|:  atan(|y|/|x|)
+            if |y| > |x|:   π/2 - atan(|x|/|y|)
+        and then the quadrant is given by the signs of x and y:
+            if x < 0:       π - a
+            if y < 0:       -a
+            if x = 0 and y = 0: undefined
         """
         if isinstance(y, int):
             y = DecimalNumber(y)
         if isinstance(x, int):
             x = DecimalNumber(x)
-
-        scale: int = DecimalNumber.get_scale()
-        DecimalNumber.set_scale(DecimalNumber.get_scale() + 4) # extra digits for intermediate steps
-        r = DecimalNumber()
-        if x == 0:
-            if y == 0:
-                raise DecimalNumberExceptionMathDomainError(
-                    "Undefined value for atan2(0, 0)")
-            elif y > 0:
-                r = (DecimalNumber.pi() / 2)
-            else:
-                r = (-DecimalNumber.pi() / 2)
-        else:
-            r = (y / x).atan()
-            if x < 0:
-                if y >= 0:
-                    r += DecimalNumber.pi()
-                else:
-                    r -= DecimalNumber.pi()
-
-        DecimalNumber.set_scale(scale)
-        return +r
+        if x == 0 and y == 0:
+            raise DecimalNumberExceptionMathDomainError(
+                "Undefined value for atan2(0, 0)")
+        scale: int = DecimalNumber._scale_of(context)
+        digits: int = scale + 6
+        a: int = _atan2_fixed(y._to_fixed(digits), x._to_fixed(digits), digits)
+        return DecimalNumber._new()._set(a, digits, scale)
 
     @staticmethod
     def version() -> str:
@@ -517,8 +758,13 @@ class DecimalNumber:
         Scale is a class value, the maximum number of decimals that a DecimalNumber can have.
         The default value is 16. The maximum value is only limited by the available
         memory and computer power."""
+        global _round_at, _max_mantissa
         if num_digits >= 0:
-            DecimalNumber._scale = num_digits
+            if DecimalNumber._scale != num_digits:     # DecimalContext sets it again and again
+                DecimalNumber._scale = num_digits
+            _round_at = num_digits + (DecimalNumber.DEFERRED_GUARD if _deferred else 0)
+            _set_pow10_max(num_digits)
+            _max_mantissa = _pow10(_round_at + DecimalNumber.INTEGER_DIGITS)
         else:
             raise DecimalNumberExceptionMathDomainError(
                 "set_scale: scale must be positive")
@@ -528,6 +774,32 @@ class DecimalNumber:
         """Gets the current scale value."""
         return DecimalNumber._scale
 
+    @staticmethod
+    def set_deferred(deferred: bool) -> None:
+        """Sets deferred normalization.
+        Normally every operation rounds its result to the scale and removes its
+        trailing zeros. In deferred mode, intermediate results keep their trailing
+        zeros and are only rounded when they exceed the scale + DEFERRED_GUARD
+        decimals, so chains of operations skip most of that work. Values are
+        normalized when they are converted to a string or by normalize().
+        The guard digits are truncated, not rounded: the final rounding to the
+        scale is the only one that needs to be exact.
+        Functions that take a context (exp, ln, sin...) still return normalized values."""
+        global _deferred, _round_at, _max_mantissa
+        _deferred = deferred
+        _round_at = DecimalNumber._scale + (DecimalNumber.DEFERRED_GUARD if deferred else 0)
+        _max_mantissa = _pow10(_round_at + DecimalNumber.INTEGER_DIGITS)
+
+    @staticmethod
+    def get_deferred() -> bool:
+        """Gets the deferred normalization mode (see set_deferred)."""
+        return _deferred
+
+    @staticmethod
+    def _scale_of(context: "DecimalContext") -> int:
+        """Returns the scale of 'context', or the current scale if it is None."""
+        return DecimalNumber._scale if context is None else context.scale
+
     @staticmethod
     def _parse_number(number: str) -> Tuple[bool, int, int]:
         """This is a static and auxiliary method to parse a string containing
@@ -537,56 +809,43 @@ class DecimalNumber:
             Integer representing the number of decimals.
         For example: "-12345.678" will be parsed and the values returned will be:
             (True, -12345678, 3)
-        If the parsing fails, it returns (Falsem 0, 0).
-        Note: this is faster than using a regular expression. Also, when using
-        the regular expression "^\-?[0-9]+\.?[0-9]*" and exception was raised when
-        using micropython when the string "number" was long.
+        If the parsing fails, it returns (False, 0, 0).
+        The digits before and after the decimal separator are joined and
+        converted with a single int(), the number of decimals is given by the
+        position of the separator. isdigit() rejects anything int() would
+        accept besides digits (sign, spaces, '_').
+        An exponent, as displayed by to_string_scientific, is subtracted from
+        the decimals, which may then be negative: "1.5e3" gives (True, 15, -2).
         """
-          # True: correct
-        # Note:
-        step: int = 1   # 1: '-', 2: [0-9], 3: '.', 4: [0-9]
-        position: int = 0
-        integer_number: int = 0
-        is_positive: bool = True
-        num_decimals: int = 0
-        number = tuple(number,)     # Faster than indexing the string
-        length: int = len(number)
-        digits: str = "0123456789"
-        last_valid: int = 0
-        while position < length:
-            if step == 1:
-                if number[position] == '-':
-                    is_positive = False
-                    position += 1
-                step = 2
-            elif step == 2:
-                if digits.find(number[position]) != -1:  # [0-9]+
-                    integer_number = integer_number * \
-                        10 + int(number[position])
-                    position += 1
-                    last_valid = position
-                else:
-                    step = 3
-            elif step == 3:
-                if number[position] == DecimalNumber.DECIMAL_SEP:
-                    position += 1
-                    last_valid = position
-                step = 4
-            elif step == 4:
-                if digits.find(number[position]) != -1:  # [0-9]*
-                    integer_number = integer_number * \
-                        10 + int(number[position])
-                    num_decimals += 1
-                    position += 1
-                    last_valid = position
-                else:
-                    break
-        if last_valid == length:
-            if not is_positive:
-                integer_number = -integer_number
-            return (True, integer_number, num_decimals)
+        exponent: int = 0
+        e: int = number.find("e")
+        if e == -1:
+            e = number.find("E")
+        if e != -1:
+            text: str = number[e + 1:]
+            sign: int = 1 if text[:1] in ("-", "+") else 0
+            if not text[sign:].isdigit() or len(text) - sign > DecimalNumber.MAX_EXPONENT_DIGITS:
+                return (False, 0, 0)
+            exponent = int(text)
+            number = number[:e]
+        start: int = 1 if number[:1] == "-" else 0
+        point: int = number.find(DecimalNumber.DECIMAL_SEP, start)
+        if point == -1:
+            digits: str = number[start:]
+            num_decimals: int = 0
         else:
+            digits: str = number[start:point] + number[point + 1:]
+            num_decimals: int = len(number) - point - 1
+        if not digits:
+            # "", "." and "-." are zero, like in the original parser; "-" is not valid
+            return (number != "-" and e == -1, 0, 0)
+        if not digits.isdigit():
+            return (False, 0, 0)
+        try:
+            integer_number: int = int(digits)
+        except ValueError:      # CPython: non-ASCII digits such as '²'
             return (False, 0, 0)
+        return (True, -integer_number if start else integer_number, num_decimals - exponent)
 
     @staticmethod
     def _from_string(number: str) -> "DecimalNumber":
@@ -596,8 +855,17 @@ class DecimalNumber:
         if not correct:
             raise DecimalNumberExceptionParseError(
                 "Syntax error parsing '{0}'".format(number))
-        else:
-            n = DecimalNumber(integer_number, num_decimals)
+        return DecimalNumber._from_parts(integer_number, num_decimals)
+
+    @staticmethod
+    def _from_parts(number: int, decimals: int) -> "DecimalNumber":
+        """Returns number * 10**-decimals. Negative decimals are an exponent
+        (1e5 is (1, -5)): the value is built as an integer, then rounded to
+        the significant digits of the exponent form if it is too long."""
+        if decimals >= 0:
+            return DecimalNumber(number, decimals)
+        n = DecimalNumber(number * _pow10(-decimals))
+        n._reduce_to_scale()
         return n
 
     @staticmethod
@@ -616,35 +884,75 @@ class DecimalNumber:
         if not n2._is_positive:
             n2_number = -n2_number
         if max_decimals > n1._num_decimals:
-            n1_number *= 10 ** (max_decimals - n1._num_decimals)
+            n1_number *= _pow10(max_decimals - n1._num_decimals)
         if max_decimals > n2._num_decimals:
-            n2_number *= 10 ** (max_decimals - n2._num_decimals)
+            n2_number *= _pow10(max_decimals - n2._num_decimals)
         return (n1_number, n2_number)
 
     @staticmethod
     def _isqrt(n: int) -> int:
         """Static and auxiliary method to calculate the square root
-        of an integer.
-        It uses Newton's method with integer division.
+        of an integer (floor(sqrt(n)), 0 for n < 0).
         """
         if n < 0:
             return 0
-        # Calculates initial value
-        t: int = n
-        x1: int = 1
-        while t > 100:
-            x1 *= 10
-            t //= 100
-        # Uses Newton's method
-        x2: int = (x1 + n // x1) // 2
-        while abs(x2 - x1) > 1:
-            x1 = x2
-            x2 = (x1 + n // x1) // 2
-        return x2
+        return _isqrt(n)
+
+    def _to_integer(self):
+        """Returns the value as a signed int if it is an integer, otherwise None."""
+        d: int = self._num_decimals
+        if d <= 0:
+            v: int = self._number * _pow10(-d)
+        else:
+            v, r = divmod(self._number, _pow10(d))
+            if r != 0:
+                return None
+        return v if self._is_positive else -v
+
+    @staticmethod
+    def _new() -> "DecimalNumber":
+        """Returns a new DecimalNumber without running __init__.
+        Its value is undefined: it must be set (_set, copy_from) before use."""
+        return DecimalNumber.__new__(DecimalNumber)
+
+    def _set(self, number: int, decimals: int, scale: int = -1) -> "DecimalNumber":
+        """Sets self to the signed integer 'number' with 'decimals' decimals,
+        reduced to 'scale' (-1: the current scale). Returns self."""
+        if number >= 0:
+            self._is_positive = True
+            self._number = number
+        else:
+            self._is_positive = False
+            self._number = -number
+        self._num_decimals = decimals
+        self._reduce_to_scale(scale)
+        return self
+
+    def _set_exact(self, number: int, decimals: int, scale: int = -1) -> "DecimalNumber":
+        """Like _set, for a value that does not need rounding (decimals <= scale).
+        Only the trailing zeros are removed (not in deferred mode). Returns self."""
+        self._is_positive = number >= 0
+        if number < 0:
+            number = -number
+        if number >= (_max_mantissa if scale < 0 else _pow10(scale + DecimalNumber.INTEGER_DIGITS)):
+            # too many significant digits: exponent form (see INTEGER_DIGITS)
+            self._number = number
+            self._num_decimals = decimals
+            self._reduce_to_scale(scale)
+            return self
+        if number == 0:
+            decimals = 0
+        elif scale >= 0 or not _deferred:
+            while decimals > 0 and number % 10 == 0:
+                number //= 10
+                decimals -= 1
+        self._number = number
+        self._num_decimals = decimals
+        return self
 
     def clone(self) -> "DecimalNumber":
         """Returns a new DecimalNumber as a clone of self."""
-        n = DecimalNumber()
+        n = DecimalNumber._new()
         n._number = self._number
         n._num_decimals = self._num_decimals
         n._is_positive = self._is_positive
@@ -656,197 +964,278 @@ class DecimalNumber:
         self._num_decimals = other._num_decimals
         self._is_positive = other._is_positive
 
-    def square_root(self) -> "DecimalNumber":
-        """Calculates the square root of a DecimalNumber.
-        It converts the DecimalNumber to an integer (without decimals), calculates
-        its square root using _isqrt() and then it sets the decimals.
-        """
+    def square_root(self, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Calculates the square root of a DecimalNumber (see _root)."""
         if not self._is_positive:
             raise DecimalNumberExceptionMathDomainError(
                 "No square root for negative numbers")
+        scale: int = DecimalNumber._scale_of(context)
+        key: tuple = self._cache_key("sqrt", scale)
+        r = _cache_get(key)
+        if r is not None:
+            return r
+        return _cache_put(key, self._root(2, scale))
+
+    def nthroot(self, n, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Calculates the n-th root of x for an integer n >= 1 (see _root).
+        Odd roots of negative numbers are negative.
+        """
+        k = n if isinstance(n, int) else n._to_integer()
+        if k is None or k < 1:
+            raise DecimalNumberExceptionMathDomainError(
+                "root(x, n): n must be a positive integer")
+        if not self._is_positive and k % 2 == 0:
+            raise DecimalNumberExceptionMathDomainError(
+                "No even root for negative numbers")
+        r = self._root(k, DecimalNumber._scale_of(context))
+        r._is_positive = self._is_positive or r._number == 0
+        return r
+
+    def _root(self, n: int, scale: int) -> "DecimalNumber":
+        """Returns |self| ** (1/n), rounded to 'scale'.
+        The mantissa is scaled so that the integer root (_iroot) has 'scale' + 2
+        decimals, or the significant digits only for an exponent form result
+        (see INTEGER_DIGITS). A sticky digit marks inexact roots, so the
+        rounding half to even is exact.
+        """
+        m: int = self._number
+        if m == 0 or n == 1:
+            return DecimalNumber._new()._set(m, self._num_decimals, scale)
+        d: int = self._num_decimals
+        digits: int = scale + 2         # decimals of the root
+        root_digits: int = -(-(len(str(m)) - d) // n)     # integer digits of the root
+        if root_digits > DecimalNumber.INTEGER_DIGITS:
+            digits -= root_digits - DecimalNumber.INTEGER_DIGITS
+        # root * 10**digits = (m * 10**(n * digits - d)) ** (1/n)
+        k: int = n * digits - d
+        exact: bool = True
+        if k >= 0:
+            a: int = m * _pow10(k)
+        else:
+            a, rem = divmod(m, _pow10(-k))
+            exact = rem == 0
+        r: int = _iroot(a, n)
+        if not exact or r ** n != a:
+            r = r * 10 + 1
+            digits += 1
+        return DecimalNumber._new()._set(r, digits, scale)
 
-        n = DecimalNumber()
-        num_integer: int = self._number
-        num_integer *= (10 ** (DecimalNumber.get_scale() * 2))
-        additional_decimals: int = 0
-        if (self._num_decimals % 2) == 1:
-            num_integer *= 10
-            additional_decimals = 1
-
-        num_integer = DecimalNumber._isqrt(num_integer)
-        n._number = num_integer
-        n._num_decimals = (
-            (self._num_decimals + additional_decimals) // 2) + DecimalNumber.get_scale()
-        n._reduce_to_scale()
-        return n
+    @staticmethod
+    def _add_into(dest: "DecimalNumber", n1: "DecimalNumber", n2, subtract: bool,
+                  scale: int = -1) -> "DecimalNumber":
+        """Static and auxiliary method that stores n1 + n2 (or n1 - n2) in dest,
+        rounded to 'scale' (-1: the current scale). n2 may be an int. dest may
+        be n1 or n2, so in-place operators need no temporary object.
+        """
+        #   123.723 + 4.56  : 123723
+        #                   :   4560 --> Apply 3 decimals to 456 --> 4560
+        #                   : 128283 --> 128.283
+        a: int = n1._number if n1._is_positive else -n1._number
+        if isinstance(n2, int):
+            b: int = n2
+            b_decimals: int = 0
+        else:
+            b: int = n2._number if n2._is_positive else -n2._number
+            b_decimals: int = n2._num_decimals
+        decimals: int = n1._num_decimals
+        if decimals == b_decimals:
+            # Fast lane: the operands are aligned, so there is no scaling by a power
+            # of ten (small mantissas stay small ints) and no rounding is needed.
+            if decimals <= (_round_at if scale < 0 else scale):
+                return dest._set_exact(a - b if subtract else a + b, decimals, scale)
+        else:
+            gap: int = b_decimals - decimals
+            digits: int = (_round_at if scale < 0 else scale) + DecimalNumber.INTEGER_DIGITS
+            if gap > digits or -gap > digits:
+                # Exponents far apart (see INTEGER_DIGITS): aligning them would build
+                # a huge integer, but the smaller operand may be below the last
+                # digit of the larger one and then the sum is just the larger one.
+                lead_a: int = len(str(a if a >= 0 else -a)) - decimals
+                lead_b: int = len(str(b if b >= 0 else -b)) - b_decimals
+                if lead_a - lead_b > digits + 1 and (a if a >= 0 else -a) < _pow10(digits):
+                    return dest._set(a, decimals, scale)
+                if lead_b - lead_a > digits + 1 and (b if b >= 0 else -b) < _pow10(digits):
+                    return dest._set(-b if subtract else b, b_decimals, scale)
+            if gap > 0:
+                a *= _pow10(gap)
+                decimals = b_decimals
+            else:
+                b *= _pow10(-gap)
+        return dest._set(a - b if subtract else a + b, decimals, scale)
+
+    @staticmethod
+    def _mul_into(dest: "DecimalNumber", n1: "DecimalNumber", n2, scale: int = -1) -> "DecimalNumber":
+        """Static and auxiliary method that stores n1 * n2 in dest. n2 may be an int."""
+        a: int = n1._number if n1._is_positive else -n1._number
+        if isinstance(n2, int):
+            b: int = n2
+            decimals: int = n1._num_decimals
+        else:
+            b: int = n2._number if n2._is_positive else -n2._number
+            decimals: int = n1._num_decimals + n2._num_decimals
+        if decimals <= (_round_at if scale < 0 else scale):
+            return dest._set_exact(a * b, decimals, scale)      # fast lane: no rounding
+        return dest._set(a * b, decimals, scale)
+
+    @staticmethod
+    def _div_into(dest: "DecimalNumber", n1: "DecimalNumber", n2, scale: int = -1) -> "DecimalNumber":
+        """Static and auxiliary method that stores n1 / n2 in dest. n2 may be an int."""
+        a: int = n1._number if n1._is_positive else -n1._number
+        a_decimals: int = n1._num_decimals
+        if isinstance(n2, int):
+            b: int = n2
+            b_decimals: int = 0
+        else:
+            b: int = n2._number if n2._is_positive else -n2._number
+            b_decimals: int = n2._num_decimals
+        if b == 0:
+            raise DecimalNumberExceptionDivisionByZeroError("Division by zero")
+        digits: int = (_round_at if scale < 0 else scale) + 2
+        # n1 / n2 * 10**digits = a * 10**k / b
+        k: int = digits + b_decimals - a_decimals
+        if k < 0 or k > 2 * digits + DecimalNumber.INTEGER_DIGITS:
+            # Exponent form (see INTEGER_DIGITS): only the significant digits of
+            # the quotient are computed, whatever its magnitude.
+            lead: int = ((len(str(a if a >= 0 else -a)) - a_decimals)
+                         - (len(str(b if b >= 0 else -b)) - b_decimals))
+            if lead < -digits:
+                return dest._set(0, 0, scale)
+            significant: int = digits + DecimalNumber.INTEGER_DIGITS
+            if lead > significant - digits:
+                digits = significant - lead     # negative: an exponent
+                k = digits + b_decimals - a_decimals
+        if k >= 0:
+            c: int = (a * _pow10(k)) // b
+        else:
+            c: int = a // (b * _pow10(-k))
+        return dest._set(c, digits, scale)
 
     def __add__(self, other: "DecimalNumber") -> "DecimalNumber":
         """Adds two DecimalNumber.
         Returns (self + other)
         """
-        if isinstance(other, int):
-            other = DecimalNumber(other)
-
-        #   123 + 456       : 123
-        #                   : 456
-        #                   : 579
-        #   123 + 4.56      : 123   0
-        #                   :   4   56
-        #                   : 127   56  --> 127 + Apply 2 decimals to 56 --> 0.56
-        #   123 + 0.0456    : 123   0
-        #                   :   0   456
-        #                   : 123   456 --> 123 + Apply 4 decimals to 456 --> 0.0456
-        #   123.723 + 4.56  : 123   723
-        #                   :   4   560 --> Apply 3 decimals to 56 --> 560
-        #                   : 127  1283 --> 127 + Apply 3 decimals to 1283 --> 0.283 --> Add 1 to 127 --> 128
-        #   0.0123 + 0.56   :   0   123
-        #                   :   0    56 --> Apply 4 decimals to 56 --> 5600
-        #                   :   0  5723 --> 123 + 5600
-
-        max_decimals: int = max(self._num_decimals, other._num_decimals)
-
-        a_factor: int = 10 ** self._num_decimals
-        b_factor: int = 10 ** other._num_decimals
-
-        a_integer: int = self._number // a_factor
-        a_decimals: int = self._number % a_factor
-        b_integer: int = other._number // b_factor
-        b_decimals: int = other._number % b_factor
-
-        if self._num_decimals < max_decimals:
-            a_decimals *= (10 ** (max_decimals - self._num_decimals))
-
-        if other._num_decimals < max_decimals:
-            b_decimals *= (10 ** (max_decimals - other._num_decimals))
-
-        c_factor: int = max(a_factor, b_factor)
-        a_all: int = a_integer * c_factor + a_decimals
-        b_all: int = b_integer * c_factor + b_decimals
-
-        c_all: int = (a_all if self._is_positive else -a_all) + (b_all if other._is_positive else -b_all)
-        c_is_positive: bool = (c_all > 0)
-        if c_all < 0:
-            c_all = -c_all
-
-        new_number = DecimalNumber(c_all, max_decimals)
-        new_number._is_positive = c_is_positive
-
-        new_number._reduce_to_scale()
-
-        return new_number
+        return DecimalNumber._add_into(DecimalNumber._new(), self, other, False)
 
     def __iadd__(self, other: "DecimalNumber") -> "DecimalNumber":
         """Adds a DecimalNumber to itself.
         Returns (self += other)
         """
-        n = self.__add__(other)
-        self._number = n._number
-        self._num_decimals = n._num_decimals
-        self._is_positive = n._is_positive
-        return self
+        return DecimalNumber._add_into(self, self, other, False)
 
     def __radd__(self, other: int) -> "DecimalNumber":
         """Reverse add.
         It is called for (integer + DecimalNumber).
         At this moment, micropython does not support it.
         """
-        return self.__add__(DecimalNumber(other))
+        return DecimalNumber._add_into(DecimalNumber._new(), self, other, False)
 
     def __sub__(self, other: "DecimalNumber") -> "DecimalNumber":
-        if isinstance(other, int):
-            other = DecimalNumber(other)
-        s = other.clone()
-        s._is_positive = not s._is_positive
-        return self.__add__(s)
+        return DecimalNumber._add_into(DecimalNumber._new(), self, other, True)
 
     def __isub__(self, other: "DecimalNumber") -> "DecimalNumber":
-        n = self.__sub__(other)
-        self._number = n._number
-        self._num_decimals = n._num_decimals
-        self._is_positive = n._is_positive
-        return self
+        return DecimalNumber._add_into(self, self, other, True)
 
     def __rsub__(self, other: int) -> "DecimalNumber":
         return DecimalNumber(other).__sub__(self)
 
     def __mul__(self, other: "DecimalNumber") -> "DecimalNumber":
-        if isinstance(other, int):
-            other = DecimalNumber(other)
-        a_integer: int = self._number if self._is_positive else -self._number
-        b_integer: int = other._number if other._is_positive else -other._number
-        c_integer: int = a_integer * b_integer
-        new_number = DecimalNumber(
-            c_integer, self._num_decimals + other._num_decimals)
-        return new_number
+        return DecimalNumber._mul_into(DecimalNumber._new(), self, other)
 
     def __imul__(self, other: "DecimalNumber") -> "DecimalNumber":
-        n = self.__mul__(other)
-        self._number = n._number
-        self._num_decimals = n._num_decimals
-        self._is_positive = n._is_positive
-        return self
+        return DecimalNumber._mul_into(self, self, other)
 
     def __rmul__(self, other: int) -> "DecimalNumber":
-        return self.__mul__(DecimalNumber(other))
+        return DecimalNumber._mul_into(DecimalNumber._new(), self, other)
 
     def __truediv__(self, other: "DecimalNumber") -> "DecimalNumber":
-        if isinstance(other, int):
-            other = DecimalNumber(other)
-        # a_integer: int = self._number if self._is_positive else -self._number
-        # b_integer: int = other._number if other._is_positive else -other._number
-        a_integer: int
-        b_integer: int
-        a_integer, b_integer = DecimalNumber._make_integer_comparable(self, other)
-        if b_integer != 0:
-            c_factor: int = 10 ** (DecimalNumber.get_scale() + 2)
-            c_integer: int = (a_integer * c_factor) // b_integer
-            new_number = DecimalNumber(
-                c_integer, (DecimalNumber.get_scale() + 2))
-        else:
-            raise DecimalNumberExceptionDivisionByZeroError("Division by zero")
-        return new_number
+        return DecimalNumber._div_into(DecimalNumber._new(), self, other)
 
     def __itruediv__(self, other: "DecimalNumber") -> "DecimalNumber":
-        n = self.__truediv__(other)
-        self._number = n._number
-        self._num_decimals = n._num_decimals
-        self._is_positive = n._is_positive
-        return self
+        return DecimalNumber._div_into(self, self, other)
 
     def __rtruediv__(self, other: int) -> "DecimalNumber":
         return DecimalNumber(other).__truediv__(self)
 
-    def __pow__(self, other: int) -> "DecimalNumber":
-        # Exponentition by squaring: https://en.wikipedia.org/wiki/Exponentiation_by_squaring
+    def __pow__(self, other) -> "DecimalNumber":
+        return self.power(other)
+
+    def power(self, other, context: "DecimalContext" = None) -> "DecimalNumber":
+        """Calculates x ** y. y may be an int or a DecimalNumber.
+        For an integer y: exponentition by squaring
+        https://en.wikipedia.org/wiki/Exponentiation_by_squaring
+        The intermediate steps run with extra digits, passed down to the
+        operations, and the result is rounded to the scale of 'context'.
+        Other exponents: see _power_real.
+        """
+        if not isinstance(other, int):
+            n = other._to_integer()
+            if n is None:
+                return self._power_real(other, context)
+            other = n
         e: int = other
-        x = self.clone()
-        x._is_positive = True
         if other == 0:
             return DecimalNumber(1)
-        scale: int = DecimalNumber.get_scale()
-
-        # Calculating the necessary extra scale:
-        extra = abs(other) * (len(str(self._number)) - self._num_decimals)
-        # extra digits for intermediate steps
-        DecimalNumber.set_scale(scale + extra)
+        scale: int = DecimalNumber._scale_of(context)
+        integer_digits: int = len(str(self._number)) - self._num_decimals
         if other < 0:
-            x = DecimalNumber(1) / x
-            other = -other
+            if integer_digits < 1:
+                # x ** -n = (1 / x) ** n ; 1 / x > 1 needs the relative precision of the result
+                y = DecimalNumber._div_into(DecimalNumber._new(), DecimalNumber(1), self,
+                                            scale + DecimalNumber.INTEGER_DIGITS + len(str(other)) + 1)
+                return y.power(-other, context)
+            # x ** -n = 1 / x ** n
+            p = self.power(-other, DecimalContext(scale + 2))
+            return DecimalNumber._div_into(p, DecimalNumber(1), p, scale)
+
+        # Calculating the necessary extra scale: the result has about n * integer_digits
+        # integer digits. Beyond INTEGER_DIGITS of them the precision is relative (see
+        # INTEGER_DIGITS), so they are capped. The rounding errors of the steps add up
+        # to about n units of the last digit.
+        extra: int = other * integer_digits if integer_digits > 0 else 0
+        if extra > DecimalNumber.INTEGER_DIGITS:
+            extra = DecimalNumber.INTEGER_DIGITS
+        s: int = scale + extra + len(str(other))      # extra digits for intermediate steps
+        x = self.clone()
+        x._is_positive = True
         y = DecimalNumber(1)
         while other > 1:
             if (other % 2) == 0:
-                x *= x
+                DecimalNumber._mul_into(x, x, x, s)
                 other //= 2
             else:
-                y *= x
-                x *= x
+                DecimalNumber._mul_into(y, y, x, s)
+                DecimalNumber._mul_into(x, x, x, s)
                 other = (other - 1) // 2
-        x *= y
-        DecimalNumber.set_scale(scale)
+        DecimalNumber._mul_into(x, x, y, scale)
         if not self._is_positive and (e % 2) == 1:
-            return -x
-        else:
-            return +x
+            x._is_positive = x._number == 0
+        return x
+
+    def _power_real(self, y: "DecimalNumber", context: "DecimalContext") -> "DecimalNumber":
+        """Calculates x ** y for a non-integer y and x >= 0
+        A half-integer y = k / 2 (k odd) is sqrt(x) ** k, with no exp() or ln().
+        Otherwise x ** y = exp(y * ln(x)), with y * ln(x) computed on fixed point
+        integers with the digits needed by the relative precision of the result.
+        """
+        if self._number == 0:
+            if y._is_positive:
+                return DecimalNumber(0)
+            raise DecimalNumberExceptionDivisionByZeroError("Division by zero")
+        if not self._is_positive:
+            raise DecimalNumberExceptionMathDomainError(
+                "x ** y for x < 0 needs an integer y")
+        scale: int = DecimalNumber._scale_of(context)
+        d: int = y._num_decimals
+        k: int = y._number if y._is_positive else -y._number
+        if (2 * k) % _pow10(d) == 0:
+            k = (2 * k) // _pow10(d)
+            # (1/x) ** k in power() needs the relative precision of a small root
+            r = self._root(2, 2 * scale + DecimalNumber.INTEGER_DIGITS + len(str(k)) + 2)
+            return r.power(k, context)
+        y_digits: int = len(str(y._number)) - d      # integer digits of y
+        digits: int = scale + DecimalNumber.INTEGER_DIGITS + 4 + (y_digits if y_digits > 0 else 0)
+        t: int = (k * _ln_fixed(self._number, self._num_decimals, digits)) // _pow10(d)
+        return DecimalNumber._new()._set(t, digits, digits).exp(context=context)
 
     def __neg__(self) -> "DecimalNumber":
         n = self.clone()
@@ -865,104 +1254,101 @@ class DecimalNumber:
         n._reduce_to_scale()
         return n
 
-    def __lt__(self, other: "DecimalNumber") -> bool:  # Less than
+    def _cmp(self, other) -> int:
+        """Compares self with a DecimalNumber or an int. Returns -1, 0 or 1.
+        Operands with the same number of decimals (and ints against integers)
+        are compared directly, without scaling or temporary objects."""
+        a: int = self._number if self._is_positive else -self._number
         if isinstance(other, int):
-            other = DecimalNumber(other)
-        n1, n2 = DecimalNumber._make_integer_comparable(self, other)
-        return (n1 < n2)
+            b: int = other
+            b_decimals: int = 0
+        else:
+            b: int = other._number if other._is_positive else -other._number
+            b_decimals: int = other._num_decimals
+        if self._num_decimals > b_decimals:
+            b *= _pow10(self._num_decimals - b_decimals)
+        elif self._num_decimals < b_decimals:
+            a *= _pow10(b_decimals - self._num_decimals)
+        return (a > b) - (a < b)
+
+    def __lt__(self, other: "DecimalNumber") -> bool:  # Less than
+        return self._cmp(other) < 0
 
     def __le__(self, other: "DecimalNumber") -> bool:  # Less than or equal to
-        if isinstance(other, int):
-            other = DecimalNumber(other)
-        n1, n2 = DecimalNumber._make_integer_comparable(self, other)
-        return (n1 <= n2)
+        return self._cmp(other) <= 0
 
     def __eq__(self, other: "DecimalNumber") -> bool:  # Equal to
-        if isinstance(other, int):
-            other = DecimalNumber(other)
-        n1, n2 = DecimalNumber._make_integer_comparable(self, other)
-        return (n1 == n2)
+        return self._cmp(other) == 0
 
     def __ne__(self, other: "DecimalNumber") -> bool:  # Not equal to
-        if isinstance(other, int):
-            other = DecimalNumber(other)
-        n1, n2 = DecimalNumber._make_integer_comparable(self, other)
-        return (n1 != n2)
+        return self._cmp(other) != 0
 
     def __gt__(self, other: "DecimalNumber") -> bool:  # Greater than
-        if isinstance(other, int):
-            other = DecimalNumber(other)
-        n1, n2 = DecimalNumber._make_integer_comparable(self, other)
-        return (n1 > n2)
+        return self._cmp(other) > 0
 
     def __ge__(self, other: "DecimalNumber") -> bool:  # Greater than or equal to
-        if isinstance(other, int):
-            other = DecimalNumber(other)
-        n1, n2 = DecimalNumber._make_integer_comparable(self, other)
-        return (n1 >= n2)
+        return self._cmp(other) >= 0
+
+    def normalize(self) -> "DecimalNumber":
+        """Returns a copy of self rounded to the scale, without trailing zeros.
+        Only needed for values computed in deferred mode (see set_deferred),
+        before they leave it."""
+        n = self.clone()
+        n._reduce_to_scale(DecimalNumber._scale)
+        return n
 
     def __str__(self, thousands: bool = False) -> str:
+        if _deferred and (self._num_decimals > DecimalNumber._scale or (
+                self._num_decimals > 0 and self._number % 10 == 0)):
+            return self.normalize().__str__(thousands)
         #   Integer / Decimals: String
         #   12345 / 0: 12345
         #   12345 / 1: 1234.5
-        #   12345 / 2: 123.45
         #   12345 / 3: 12.345
-        #   12345 / 4: 1.2345
         #   12345 / 5: 0.12345
-        #   12345 / 6: 0.012345
-        #   12345 / 7: 0.0012345
         #   12345 / 8: 0.00012345
-        str_number: str = str(
-            self._number) if self._number >= 0 else str(-self._number)
-        if self._num_decimals != 0:
-            num_digits: int = len(str_number)
-            if self._num_decimals < num_digits:
-                str_number = str_number[:(
-                    num_digits - self._num_decimals)] + "." + str_number[-self._num_decimals:]
-            else:
-                str_number = "0" + "." + \
-                    ("0" * (self._num_decimals - num_digits)) + str_number
-
+        #   12345 / -3: 12345000
+        # The string is assembled in one pass with the configured separators.
+        str_number: str = str(self._number)
+        decimals: int = self._num_decimals
+        if decimals < 0:
+            str_number += "0" * -decimals
+            decimals = 0
+        length: int = len(str_number) - decimals     # digits before the point
         if thousands:
-            pos_decimal: int = str_number.find(".")
-            if pos_decimal == -1:
-                first_part: str = str_number
-                second_part: str = ""
+            integer_part: str = "{:,d}".format(int(str_number[:length]) if length > 0 else 0)
+            if DecimalNumber.THOUSANDS_SEP != ",":
+                integer_part = integer_part.replace(",", DecimalNumber.THOUSANDS_SEP)
+        elif decimals == 0:
+            integer_part: str = str_number
+        elif length > 0:
+            integer_part: str = str_number[:length]
+        else:
+            integer_part: str = "0"
+        if decimals != 0:
+            if length >= 0:
+                integer_part += DecimalNumber.DECIMAL_SEP + str_number[length:]
             else:
-                first_part: str = str_number[:pos_decimal]
-                second_part: str = str_number[pos_decimal + 1:]
-            first_part = "{:,d}".format(int(first_part))
-            ##### Commenting this part to not separate decimals ###############################
-            # if len(second_part) > 0:
-            #     # Note: reversing with second_part[::-1] is not available for micropython
-            #     second_part = "{:,d}".format(int( ''.join(reversed(second_part)) ))
-            #     second_part = ''.join(reversed(second_part))
-            ###################################################################################
-            str_number = first_part
-            if len(second_part) > 0:
-                str_number += "." + second_part
-
-        str_number = str_number.replace(".", "#")
-        str_number = str_number.replace(",", DecimalNumber.THOUSANDS_SEP)
-        str_number = str_number.replace("#", DecimalNumber.DECIMAL_SEP)
-
+                integer_part += DecimalNumber.DECIMAL_SEP + "0" * -length + str_number
         if not self._is_positive:
-            str_number = "-" + str_number
-
-        return str_number
+            return "-" + integer_part
+        return integer_part
 
     def __repr__(self) -> str:
         return 'DecimalNumber("' + str(self) + '")'
 
     def to_int_truncate(self) -> int:
-        return self._number // (10 ** self._num_decimals)
+        if self._num_decimals < 0:
+            return self._number * _pow10(-self._num_decimals)
+        return self._number // _pow10(self._num_decimals)
 
     def to_int_round(self) -> int:
+        if self._num_decimals <= 0:
+            return self.to_int_truncate()
         n = self.clone()
-        s = DecimalNumber.get_scale()
-        DecimalNumber.set_scale(0)
-        n._reduce_to_scale()
-        DecimalNumber.set_scale(s)
+        n._reduce_to_scale(0)
+        if n._num_decimals < 0:
+            return n._number * _pow10(-n._num_decimals)
         return n._number
 
     def to_string_thousands(self) -> str:
@@ -970,41 +1356,119 @@ class DecimalNumber:
 
     # Returns a string representing the number limited to N characters, including '.', '-' and, optionally thousands.
     # It is useful to limit the number to the length of a calculator's LCD display, for example.
-    # If the number does not fit, it returns "Overflow".
-    def to_string_max_length(self, max_length: int, thousands: bool = False) -> None:
+    # Numbers too large for the fixed notation, and small ones that would lose their
+    # significant digits, are shown in scientific (or engineering) notation, see
+    # to_string_scientific. It only returns "Overflow" if even that does not fit.
+    def to_string_max_length(self, max_length: int, thousands: bool = False, engineering: bool = False) -> str:
         if max_length < 8:
             max_length = 8
 
+        if self._number == 0:
+            return "0"
+        significant: int = len(str(self._number))
+        lead: int = significant - self._num_decimals    # digits before the point
+        if lead > max_length:
+            return self.to_string_scientific(max_length, engineering)
+        if lead <= 0:
+            #   0.000000000012345: '0.' and the zeros leave too few digits
+            shown: int = max_length - 2 + lead - (0 if self._is_positive else 1)
+            if shown < min(significant, DecimalNumber.SCI_MIN_DIGITS):
+                return self.to_string_scientific(max_length, engineering)
+
         str_number: str = self.__str__(thousands)
         #   1,234,567,890.1234567
-        #   If the number of characters before '.' is greater than max_length --> Overflow
-        pos_point: int = str_number.find('.')
+        #   If the number of characters before '.' is greater than max_length --> scientific
+        pos_point: int = str_number.find(DecimalNumber.DECIMAL_SEP)
         if pos_point == -1:     # No decimals
-            pos_point = len(str_number)
-        if pos_point > max_length:
-            return "Overflow"
-        else:
-            str_number = str_number[:max_length]
-            # If there are decimals, we can eliminate trailing zeros
-            pos_point: int = str_number.find('.')
-            if pos_point != -1:
-                # 123.34000
-                while str_number[-1:] == '0':
-                    str_number = str_number[:-1]
-                # If the last character is a point, it can be deleted
-                if str_number[-1:] == '.':
-                    str_number = str_number[:-1]
-            if str_number == "-0":
-                str_number = "0"
+            if len(str_number) > max_length:
+                return self.to_string_scientific(max_length, engineering)
             return str_number
+        if pos_point > max_length:
+            return self.to_string_scientific(max_length, engineering)
+        str_number = str_number[:max_length]
+        if pos_point < max_length:
+            # 123.34000 --> 123.34 ; 123.000 --> 123
+            str_number = str_number.rstrip("0").rstrip(DecimalNumber.DECIMAL_SEP)
+        if str_number == "-0":
+            str_number = "0"
+        return str_number
+
+    def to_string_scientific(self, max_length: int, engineering: bool = False) -> str:
+        """Returns the number in scientific notation limited to max_length characters:
+        -1.2345678e300. The mantissa is rounded half to even to the digits that fit.
+        In engineering notation the exponent is a multiple of 3: 123.45678e-9.
+        If not even the exponent fits, it returns "Overflow".
+        """
+        if self._number == 0:
+            return "0"
+        sign: str = "" if self._is_positive else "-"
+        n: int = self._number
+        significant: int = len(str(n))
+        for _ in range(2):      # a second pass if the rounding carries: 9.99 --> 10.0
+            exponent: int = significant - self._num_decimals - 1    # n = d.ddd * 10**exponent
+            shift: int = exponent % 3 if engineering else 0     # digits moved before the point
+            exponent -= shift
+            suffix: str = "e" + str(exponent)
+            room: int = max_length - len(sign) - len(suffix) - 1  # mantissa digits
+            if room < shift + 1:
+                return "Overflow"
+            drop: int = significant - room
+            if drop <= 0:
+                digits: str = str(n)
+                break
+            ds: int = _pow10(drop)
+            q, r = divmod(n, ds)
+            if 2 * r > ds or (2 * r == ds and q % 2 == 1):
+                q += 1
+            digits: str = str(q)
+            if len(digits) == room:
+                break
+            significant += 1
+        if len(digits) < shift + 1:
+            digits += "0" * (shift + 1 - len(digits))
+        fraction: str = digits[shift + 1:].rstrip("0")
+        if fraction:
+            return sign + digits[:shift + 1] + DecimalNumber.DECIMAL_SEP + fraction + suffix
+        return sign + digits[:shift + 1] + suffix
 
     def _eliminate_decimal_trailing_zeros(self) -> None:
         while self._num_decimals > 0 and (self._number % 10) == 0:
             self._number //= 10
             self._num_decimals -= 1
 
-    def _reduce_to_scale(self) -> None:
-        if self._num_decimals > DecimalNumber.get_scale():
+    def _reduce_to_scale(self, scale: int = -1) -> None:
+        """Rounds self to 'scale' decimals (-1: the current scale) and removes
+        the trailing zeros. A mantissa with more than scale + INTEGER_DIGITS
+        significant digits is rounded to that many digits, with a negative
+        number of decimals (an exponent).
+        In deferred mode, with the current scale, the value is only truncated
+        to scale + DEFERRED_GUARD decimals, and the trailing zeros are kept
+        (see set_deferred)."""
+        if scale < 0:
+            if _deferred:
+                excess: int = self._num_decimals - _round_at
+                if self._number >= _max_mantissa:
+                    e: int = len(str(self._number)) - _round_at - DecimalNumber.INTEGER_DIGITS
+                    if e > excess:
+                        excess = e
+                if excess > 0:
+                    self._number //= _pow10(excess)
+                    self._num_decimals -= excess
+                if self._number == 0:
+                    self._is_positive = True
+                    self._num_decimals = 0
+                return
+            scale = DecimalNumber._scale
+            limit: int = _max_mantissa
+        else:
+            limit: int = _pow10(scale + DecimalNumber.INTEGER_DIGITS)
+        s: int = self._num_decimals - scale     # digits to drop to round to the scale
+        if self._number >= limit:
+            digits: int = scale + DecimalNumber.INTEGER_DIGITS
+            if self._number >= _pow10(digits + (s if s > 0 else 0)):
+                # more than 'digits' significant digits, even after rounding to the scale
+                s = len(str(self._number)) - digits
+        if s > 0:
             # Round half to even: https://en.wikipedia.org/wiki/Rounding#Round_half_to_even
 
             # Example:
@@ -1014,10 +1478,9 @@ class DecimalNumber:
             #   It should be  123.457 ;  n = 123457, decimals = scale = 3
 
             n: int = self._number
-            s: int = self._num_decimals - DecimalNumber.get_scale()  # s: 6 - 3 = 3
-            ds: int = (10 ** s)
+            ds: int = _pow10(s)     # s: 6 - 3 = 3
 
-            v: int = n % (ds * 10)  # v: n % 10**4 =  6789      1000
+            v: int = n % _pow10(s + 1)  # v: n % 10**4 =  6789      1000
             b: int = v % ds         # b: v % 10**3 =   789
             a: int = v // ds        # a: v // 10**3 = 6
             m: int = ds // 2        # m: 10**3 // 2 = 500 (to be compared to b)
@@ -1034,12 +1497,80 @@ class DecimalNumber:
                     x: int = ds - b
 
             self._number = (n + x) // ds
-            self._num_decimals = DecimalNumber.get_scale()
+            self._num_decimals -= s
 
         self._eliminate_decimal_trailing_zeros()
 
-        if self._number == 0 and not self._is_positive:  # Prevents -0
-            self._is_positive = True
+        if self._number == 0:
+            self._is_positive = True    # Prevents -0
+            self._num_decimals = 0
+
+class DecimalContext:
+    """Precision for DecimalNumber operations, without changing the global scale.
+    The transcendental functions (exp, ln, sin, ..., power, square_root) take an
+    optional 'context' and round their result to its scale. The arithmetic
+    methods below do the same for +, -, * and /:
+        ctx = DecimalContext(40)
+        x = ctx.div(DecimalNumber(1), DecimalNumber(3))     # 40 decimals
+        y = x.exp(context=ctx)
+    It is also a context manager that sets the global scale and restores the
+    previous one on exit, even if an exception is raised:
+        with DecimalContext(40):
+            x = DecimalNumber(1) / 3
+    """
+
+    __slots__ = ("scale", "deferred", "_saved")
+
+    def __init__(self, scale: int = -1, deferred: bool = False) -> None:
+        """scale: number of decimals; -1 takes the current global scale.
+        deferred: deferred normalization while the context is active (see
+        DecimalNumber.set_deferred)."""
+        self.scale: int = DecimalNumber.get_scale() if scale < 0 else scale
+        self.deferred: bool = deferred
+        self._saved: list = []
+
+    def __enter__(self) -> "DecimalContext":
+        self._saved.append((DecimalNumber.get_scale(), DecimalNumber.get_deferred()))
+        DecimalNumber.set_deferred(self.deferred)
+        DecimalNumber.set_scale(self.scale)
+        return self
+
+    def __exit__(self, *args) -> None:
+        scale, deferred = self._saved.pop()
+        DecimalNumber.set_deferred(deferred)
+        DecimalNumber.set_scale(scale)
+
+    def extend(self, digits: int) -> "DecimalContext":
+        """Returns a new context with 'digits' more decimals, for intermediate steps."""
+        return DecimalContext(self.scale + digits)
+
+    def add(self, n1: "DecimalNumber", n2, dest: "DecimalNumber" = None) -> "DecimalNumber":
+        """n1 + n2 rounded to the scale of the context. It is stored in 'dest' if given."""
+        return DecimalNumber._add_into(dest or DecimalNumber._new(), n1, n2, False, self.scale)
+
+    def sub(self, n1: "DecimalNumber", n2, dest: "DecimalNumber" = None) -> "DecimalNumber":
+        """n1 - n2 rounded to the scale of the context. It is stored in 'dest' if given."""
+        return DecimalNumber._add_into(dest or DecimalNumber._new(), n1, n2, True, self.scale)
+
+    def mul(self, n1: "DecimalNumber", n2, dest: "DecimalNumber" = None) -> "DecimalNumber":
+        """n1 * n2 rounded to the scale of the context. It is stored in 'dest' if given."""
+        return DecimalNumber._mul_into(dest or DecimalNumber._new(), n1, n2, self.scale)
+
+    def div(self, n1: "DecimalNumber", n2, dest: "DecimalNumber" = None) -> "DecimalNumber":
+        """n1 / n2 rounded to the scale of the context. It is stored in 'dest' if given."""
+        return DecimalNumber._div_into(dest or DecimalNumber._new(), n1, n2, self.scale)
+
+    def round(self, n: "DecimalNumber") -> "DecimalNumber":
+        """Returns a copy of n rounded to the scale of the context."""
+        r = n.clone()
+        r._reduce_to_scale(self.scale)
+        return r
+
+    def __repr__(self) -> str:
+        return "DecimalContext(" + str(self.scale) + ")"
+
+
+DecimalNumber.set_scale(DecimalNumber.DEFAULT_SCALE)
 
 
 class DecimalNumberException(Exception):
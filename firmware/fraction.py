@@ -0,0 +1,172 @@
+from decimal import DecimalNumber, DecimalNumberExceptionDivisionByZeroError
+from intmath import gcd as _gcd
+
+
+class Fraction:
+    """ An exact rational number, numerator / denominator, for fraction mode.
+        The denominator is positive and gcd(numerator, denominator) == 1
+        after every operation.  The operations normalize incrementally: they
+        take the gcd of the pieces that can share a factor (as Knuth, TAOCP
+        4.5.1) instead of reducing the full product, so the numbers stay
+        small along chains of operations.
+        Decimal values convert exactly (x = m / 10**d); the other direction
+        rounds to the scale, see to_decimal.
+    """
+
+    def __init__(self, numerator=0, denominator=1):
+        if denominator == 0:
+            raise DecimalNumberExceptionDivisionByZeroError("Division by zero")
+        if denominator < 0:
+            numerator = -numerator
+            denominator = -denominator
+        g = _gcd(numerator, denominator)
+        if g != 1:
+            numerator //= g
+            denominator //= g
+        self.numerator = numerator
+        self.denominator = denominator
+
+    @staticmethod
+    def _make(numerator, denominator):
+        """ A Fraction from terms already normalized """
+        f = Fraction.__new__(Fraction)
+        f.numerator = numerator
+        f.denominator = denominator
+        return f
+
+    @staticmethod
+    def from_decimal(x):
+        """ The exact value of an int, a DecimalNumber or a Fraction """
+        if isinstance(x, Fraction):
+            return x
+        if isinstance(x, int):
+            return Fraction._make(x, 1)
+        n = x._number if x._is_positive else -x._number
+        d = x._num_decimals
+        if d <= 0:
+            return Fraction._make(n * 10 ** -d, 1)
+        return Fraction(n, 10 ** d)
+
+    def to_decimal(self, context=None):
+        """ The value rounded to the scale (of 'context') """
+        scale = DecimalNumber.get_scale() if context is None else context.scale
+        return DecimalNumber._div_into(DecimalNumber._new(), DecimalNumber(self.numerator),
+                                       self.denominator, scale)
+
+    def __add__(self, other):
+        other = Fraction.from_decimal(other)
+        a, b = self.numerator, self.denominator
+        c, d = other.numerator, other.denominator
+        g = _gcd(b, d)
+        if g == 1:
+            return Fraction._make(a * d + c * b, b * d)
+        s = b // g
+        t = a * (d // g) + c * s
+        g2 = _gcd(t, g)
+        if g2 == 1:
+            return Fraction._make(t, s * d)
+        return Fraction._make(t // g2, s * (d // g2))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self + -Fraction.from_decimal(other)
+
+    def __rsub__(self, other):
+        return Fraction.from_decimal(other) + -self
+
+    def __mul__(self, other):
+        other = Fraction.from_decimal(other)
+        a, b = self.numerator, self.denominator
+        c, d = other.numerator, other.denominator
+        g1 = _gcd(a, d)
+        g2 = _gcd(c, b)
+        return Fraction._make((a // g1) * (c // g2), (b // g2) * (d // g1))
+
+    __rmul__ = __mul__
+
+    def reciprocal(self):
+        if self.numerator == 0:
+            raise DecimalNumberExceptionDivisionByZeroError("Division by zero")
+        if self.numerator < 0:
+            return Fraction._make(-self.denominator, -self.numerator)
+        return Fraction._make(self.denominator, self.numerator)
+
+    def __truediv__(self, other):
+        return self * Fraction.from_decimal(other).reciprocal()
+
+    def __rtruediv__(self, other):
+        return Fraction.from_decimal(other) * self.reciprocal()
+
+    def __pow__(self, other):
+        """ Exact for an integer exponent, otherwise computed with DecimalNumber """
+        if not isinstance(other, int):
+            other = Fraction.from_decimal(other)
+            if other.denominator != 1:
+                return Fraction.from_decimal(self.to_decimal() ** other.to_decimal())
+            other = other.numerator
+        base = self
+        if other < 0:
+            base = self.reciprocal()
+            other = -other
+        return Fraction._make(base.numerator ** other, base.denominator ** other)
+
+    def __neg__(self):
+        return Fraction._make(-self.numerator, self.denominator)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Fraction._make(abs(self.numerator), self.denominator)
+
+    def square_root(self):
+        """ Exact when the numerator and the denominator are squares """
+        if self.numerator >= 0:
+            n = DecimalNumber._isqrt(self.numerator)
+            d = DecimalNumber._isqrt(self.denominator)
+            if n * n == self.numerator and d * d == self.denominator:
+                return Fraction._make(n, d)
+        return Fraction.from_decimal(self.to_decimal().square_root())
+
+    def _cmp(self, other):
+        other = Fraction.from_decimal(other)
+        a = self.numerator * other.denominator
+        b = other.numerator * self.denominator
+        return (a > b) - (a < b)
+
+    def __eq__(self, other):
+        return self._cmp(other) == 0
+
+    def __ne__(self, other):
+        return self._cmp(other) != 0
+
+    def __lt__(self, other):
+        return self._cmp(other) < 0
+
+    def __le__(self, other):
+        return self._cmp(other) <= 0
+
+    def __gt__(self, other):
+        return self._cmp(other) > 0
+
+    def __ge__(self, other):
+        return self._cmp(other) >= 0
+
+    def __hash__(self):
+        return hash((self.numerator, self.denominator))
+
+    def __str__(self):
+        if self.denominator == 1:
+            return str(self.numerator)
+        return str(self.numerator) + '/' + str(self.denominator)
+
+    def __repr__(self):
+        return 'Fraction(' + str(self.numerator) + ', ' + str(self.denominator) + ')'
+
+    def to_string_max_length(self, max_length, thousands=False, engineering=False):
+        """ n/d when it fits, otherwise the decimal value """
+        s = str(self)
+        if len(s) <= max_length:
+            return s
+        return self.to_decimal().to_string_max_length(max_length, thousands, engineering)
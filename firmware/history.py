@@ -73,6 +73,10 @@ class History(CircularList):
     def append(self, value):
         super().append(value)
         self.dirty = True
+        self.refresh()
+
+    def refresh(self):
+        """ show the most recent entries on the widgets """
         for i in range(len(self.widgets)):
             self.widgets[i].set_text(self[-(i+1)])
 
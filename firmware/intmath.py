@@ -0,0 +1,213 @@
+# Integer and combinatorics functions: factorial, nCr, nPr, gcd, lcm and
+# prime factorization.  They take and return python ints; mathexpr exposes
+# them as calculator functions.
+
+try:
+    from math import gcd
+except ImportError:
+    def gcd(a, b):
+        """ Binary gcd (Stein's algorithm): only shifts and subtractions """
+        if a < 0:
+            a = -a
+        if b < 0:
+            b = -b
+        if a == 0:
+            return b
+        if b == 0:
+            return a
+        u = a | b
+        twos = u & -u           # the power of two common to a and b
+        a //= a & -a
+        while b:
+            b //= b & -b
+            if a > b:
+                a, b = b, a
+            b -= a
+        return a * twos
+
+
+# The most factors of n!, nPr and nCr: 1000! has 2568 digits, a bound on
+# the time and the memory they take, and on the digits DecimalNumber counts
+MAX_FACTORS = 1000
+
+
+def lcm(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return abs(a // gcd(a, b) * b)
+
+
+def _product(lo, hi, step=1):
+    """ lo * (lo + step) * ... up to hi excluded, by binary splitting:
+        the halves are multiplied recursively so the two factors of every
+        multiplication have about the same size, which keeps the big
+        multiplications few.
+    """
+    n = (hi - lo + step - 1) // step
+    if n <= 0:
+        return 1
+    if n <= 8:
+        r = lo
+        for k in range(lo + step, hi, step):
+            r *= k
+        return r
+    mid = lo + (n // 2) * step
+    return _product(lo, mid, step) * _product(mid, hi, step)
+
+
+def factorial(n):
+    """ n!, as its odd part shifted left by the number of factors 2.
+        The odd part is the product over i of the odd numbers in
+        (n >> (i + 1), n >> i], each raised to the power i + 1: the
+        numbers are multiplied by binary splitting (see _product) and the
+        powers come from accumulating the partial products.
+    """
+    if n < 0:
+        raise ValueError('n! of a negative number')
+    if n > MAX_FACTORS:
+        raise ValueError('n! of n > ' + str(MAX_FACTORS))
+    inner = outer = 1
+    i = 0
+    while n >> i:
+        i += 1
+    while i >= 0:
+        lo = ((n >> (i + 1)) + 1) | 1
+        hi = ((n >> i) + 1) | 1
+        inner *= _product(lo, hi, 2)
+        outer *= inner
+        i -= 1
+    return outer << (n - bin(n).count('1'))
+
+
+def npr(n, k):
+    """ n! / (n - k)!, the number of arrangements of k out of n """
+    if n < 0 or k < 0:
+        raise ValueError('nPr of a negative number')
+    if k > n:
+        return 0
+    if k > MAX_FACTORS:
+        raise ValueError('nPr of k > ' + str(MAX_FACTORS))
+    return _product(n - k + 1, n + 1)
+
+
+def ncr(n, k):
+    """ n! / (k! (n - k)!), multiplicatively: after the i-th step the
+        partial result is C(n - k + i, i), an integer, so the division is
+        exact and no factorial is ever computed.
+    """
+    if n < 0 or k < 0:
+        raise ValueError('nCr of a negative number')
+    if k > n:
+        return 0
+    k = min(k, n - k)
+    if k > MAX_FACTORS:
+        raise ValueError('nCr of k and n - k > ' + str(MAX_FACTORS))
+    r = 1
+    m = n - k
+    for i in range(1, k + 1):
+        r = r * (m + i) // i
+    return r
+
+
+_SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47,
+                 53, 59, 61, 67, 71, 73, 79, 83, 89, 97)
+# (bound, witnesses): the first primes as witnesses make Miller-Rabin exact
+# below the bound, see https://oeis.org/A014233
+_WITNESSES = (
+    (341550071728321, _SMALL_PRIMES[:7]),
+    (3825123056546413051, _SMALL_PRIMES[:9]),
+    (318665857834031151167461, _SMALL_PRIMES[:12]),
+    (3317044064679887385961981, _SMALL_PRIMES[:13]),
+)
+
+
+def is_prime(n):
+    """ Miller-Rabin, exact for n < 3.3 * 10**24 and a strong probable
+        prime test to 25 bases above
+    """
+    if n < 2:
+        return False
+    for p in _SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    d = n - 1
+    s = 0
+    while not d & 1:
+        d >>= 1
+        s += 1
+    for bound, witnesses in _WITNESSES:
+        if n < bound:
+            break
+    else:
+        witnesses = _SMALL_PRIMES
+    for a in witnesses:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for r in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _rho(n):
+    """ A non trivial factor of n, odd and composite, by Pollard's rho with
+        Brent's cycle detection.  The differences are multiplied together
+        modulo n and only every BATCH steps go through a gcd.
+    """
+    BATCH = 64
+    c = 1
+    while True:
+        y = 2
+        r = q = g = 1
+        while g == 1:
+            x = y
+            for i in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for i in range(min(BATCH, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = gcd(q, n)
+                k += BATCH
+            r *= 2
+        if g == n:
+            # the batch went past the factor: redo it one step at a time
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = gcd(abs(x - ys), n)
+        if g != n:
+            return g
+        c += 1
+
+
+def factorize(n):
+    """ The prime factors of n > 0 as a sorted list of (prime, exponent) """
+    if n < 1:
+        raise ValueError('factors of a number < 1')
+    factors = {}
+    for p in _SMALL_PRIMES:
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+    pending = [n] if n > 1 else []
+    while pending:
+        m = pending.pop()
+        if is_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+        else:
+            d = _rho(m)
+            pending.append(d)
+            pending.append(m // d)
+    return sorted(factors.items())
+
+
+def format_factors(factors):
+    """ [(2, 3), (5, 1)] -> '2^3*5' """
+    return '*'.join(str(p) if e == 1 else str(p) + '^' + str(e) for p, e in factors)
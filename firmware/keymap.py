@@ -210,9 +210,9 @@ class ShiftKey(Key):
     return True
 
 class ToggleKey(Key):
-  def __init__(self, scancode, name, symbol):
+  def __init__(self, scancode, name, symbol, layers=None):
     self.state = False
-    super().__init__(scancode, name, symbol)
+    super().__init__(scancode, name, symbol, layers=layers)
 
   def get_state(self):
     return self.state
@@ -290,9 +290,13 @@ class MenuAction(Action):
     page = menu.active_page()
     if page is not None:
       item = page.get_child(self.menu_index)
-      print("menu item selected:",item.get_text())
+      if item is not None:
+        print("menu item selected:",item.get_text())
+        keyboard.app.menu_select(item.get_text())
       self.handled = True
-      menu.hide()
+      if menu.active_page() is page:
+        # not replaced by a submenu
+        menu.hide()
       return True
     else:
       if keyboard.layer < self.layer:
@@ -317,8 +321,15 @@ def CLEAR():
   return True
 
 def CLEAR_ALL():
-  keyboard.app.clear()
-  keyboard.app.history.clear()
+  keyboard.app.clear_all()
+  return True
+
+def TOGGLE():
+  # let the key itself handle the press
+  return False
+
+def RPN_MODE():
+  keyboard.app.toggle_rpn()
   return True
 
 def BACKSPACE():
@@ -332,7 +343,7 @@ keys = [
   ShiftKey(F17, 'F17', "SHIFT", layer_shift=1),        # 0
   Key(KP0, 'KP0', "0"),            # 1
   None,                            # 2 Not connected
-  Key(PERIOD, 'PERIOD', '.'),      # 3
+  Key(PERIOD, 'PERIOD', '.', ','), # 3
   Key(ENTER, 'ENTER', "\n", "="),  # 4
   # row 2
   Key(F18, 'F18', "CLEAR", layers=TwoLayerAction(CLEAR, CLEAR_ALL)),        # 5
@@ -351,13 +362,13 @@ keys = [
   Key(KP7, "KP7", "7"),            # 16
   Key(KP8, "KP8", "8"),            # 17
   Key(KP9, "KP9", "9"),            # 18
-  Key(ADD, "ADD", "+"),            # 19
+  Key(ADD, "ADD", "+", "("),       # 19
   #row 5
   None,                            # 20 Not connected
-  ToggleKey(NUMLOCK, "NUMLOCK", "NumLock"),# 21
+  ToggleKey(NUMLOCK, "NUMLOCK", "NumLock", layers=TwoLayerAction(TOGGLE, RPN_MODE)),# 21
   Key(DIVIDE,   "DIVIDE", "/"),        # 22
-  Key(MULTIPLY, "MULTIPLY", "*"),    # 23
-  Key(SUBTRACT, "SUBTRACT", "-"),    # 24
+  Key(MULTIPLY, "MULTIPLY", "*", ")"),    # 23
+  Key(SUBTRACT, "SUBTRACT", "-", "CHS"),    # 24
   # row 6:
   None,                              # 25 Not connected
   Key(F13,          "F13", "M1", None, menu0),# 26
@@ -0,0 +1,62 @@
+# A small bounded least-recently-used cache.
+#
+# MicroPython does not provide functools.lru_cache and its OrderedDict lacks
+# move_to_end(), so recency is tracked with a plain list of keys.  The caches
+# in this project hold a handful of entries, so the linear list operations are
+# cheaper than anything fancier would be.
+
+class LRUCache:
+
+    def __init__(self, size):
+        """Initialization"""
+        self.size = size
+        self._data = {}
+        self._order = []
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """ Return the cached value for key and mark it as most recently used """
+        if key not in self._data:
+            self.misses += 1
+            return default
+        self.hits += 1
+        order = self._order
+        if order[-1] != key:
+            order.remove(key)
+            order.append(key)
+        return self._data[key]
+
+    def put(self, key, value):
+        """ Store a value, evicting the least recently used entry when full """
+        if self.size <= 0:
+            return
+        if key in self._data:
+            self._order.remove(key)
+        elif len(self._order) >= self.size:
+            del self._data[self._order.pop(0)]
+        self._data[key] = value
+        self._order.append(key)
+
+    def trim(self, size):
+        """ Evict least recently used entries until at most size remain """
+        order = self._order
+        while len(order) > size:
+            del self._data[order.pop(0)]
+
+    def resize(self, size):
+        self.size = size
+        self.trim(size)
+
+    def clear(self):
+        self._data = {}
+        self._order = []
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._order)
+
+    def __repr__(self):
+        return 'LRUCache(' + str(len(self)) + '/' + str(self.size) + ')'
@@ -1,4 +1,11 @@
-from decimal import DecimalNumber
+from decimal import (DecimalNumber, DecimalContext, DecimalNumberExceptionMathDomainError,
+                     DecimalNumberExceptionDivisionByZeroError)
+from fraction import Fraction
+import intmath
+import programmer
+import solver
+import quadrature
+from lru import LRUCache
 import re
 import builtins
 
@@ -27,60 +34,157 @@ class Token(object):
         return str(self.final_value())
 
 
+# Operators indexed by the byte value of their (first) character.  The values
+# are shared string constants, so emitting an operator token never allocates.
+OPERATORS = {
+    ord('+'): '+',
+    ord('-'): '-',
+    ord('*'): '*',
+    ord('/'): '/',
+    ord('^'): '^',
+    ord('='): '=',
+    ord(','): ',',
+    ord('!'): '!',
+    ord('&'): '&',
+    ord('|'): '|',
+    ord('~'): '~',
+    ord('%'): '%',
+}
+# the operators of two identical characters: << and >>
+SHIFTS = {
+    ord('<'): '<<',
+    ord('>'): '>>',
+}
+# 0x, 0o and 0b integer literals
+RADIX = {
+    ord('x'): 16,
+    ord('o'): 8,
+    ord('b'): 2,
+}
+_STAR = 42   # '*'
+_ZERO = 48   # '0'
+_EXPONENT = b'eE'
+_SIGNS = b'+-'
+_POINT = 46  # '.'
+_OPEN = 40   # '('
+_CLOSE = 41  # ')'
+
+
+def _is_digit(c):
+    return 48 <= c <= 57
+
+def _is_alpha(c):
+    return 65 <= c <= 90 or 97 <= c <= 122
+
+
 class Tokenizer:
-    code = ""
-    WHITESPACE = re.compile(r"^\s+")
-    NUMBER = re.compile(r'^(\d+(\.\d*)?)')
-    GRPSTART = re.compile(r'^\(')
-    GRPEND = re.compile(r'^\)')
-    IDENTIFIER = re.compile(r'^([A-Za-z]+[A-Za-z0-9]*)')
-    OPERATOR = re.compile(r'^[+\-*/]')
+    """ Single pass lexer.  A cursor walks over the encoded input once;
+        indexing bytes yields small ints, so scanning doesn't allocate and the
+        only substrings ever created are identifier names.  Numbers are
+        accumulated straight from the digits into a DecimalNumber.
+    """
 
     def __init__(self):
         pass
 
-    def match(self):
-        if self.code == "":
-            return None
-        for kind in ('WHITESPACE', 'GRPSTART', 'GRPEND', 'NUMBER', 'OPERATOR', 'IDENTIFIER'):
-            regex = getattr(self, kind)
-            match = regex.match(self.code)
-            if match:
-                self.code = self.code[match.end():]
-                return (kind, match.group(0))
-        return None
+    def number(self, buf, pos, end):
+        """ Scan a number starting at pos, returns (DecimalNumber, new position)
+            The digit run is converted with a single int(), the number of
+            decimals comes from the position of the point, less the exponent.
+        """
+        if buf[pos] == _ZERO and pos + 1 < end and buf[pos + 1] in RADIX:
+            radix = RADIX[buf[pos + 1]]
+            pos += 2
+            start = pos
+            while pos < end and (_is_digit(buf[pos]) or _is_alpha(buf[pos])):
+                pos += 1
+            try:
+                return DecimalNumber(int(buf[start:pos], radix)), pos
+            except ValueError:
+                raise RuntimeError('Syntax error at "' + buf[start - 2:pos].decode() + '"')
+        start = pos
+        point = -1
+        while pos < end:
+            c = buf[pos]
+            if 48 <= c <= 57:
+                pos += 1
+            elif c == _POINT and point < 0:
+                point = pos
+                pos += 1
+            else:
+                break
+        if point < 0:
+            digits = buf[start:pos]
+            decimals = 0
+        else:
+            digits = buf[start:point] + buf[point + 1:pos]
+            decimals = pos - point - 1
+        if not digits:
+            raise RuntimeError('Syntax error at "."')
+        # an exponent, as in the scientific display: 1.2345e300, 5e-7
+        if pos + 1 < end and buf[pos] in _EXPONENT:
+            e = pos + 1
+            if buf[e] in _SIGNS:
+                e += 1
+            first = e
+            while e < end and _is_digit(buf[e]):
+                e += 1
+            if first < e:
+                if e - first > DecimalNumber.MAX_EXPONENT_DIGITS:
+                    raise RuntimeError('Exponent too large')
+                decimals -= int(buf[pos + 1:e])
+                pos = e
+        return DecimalNumber._from_parts(int(digits), decimals), pos
 
     def tokenize(self, code):
-        #tok_regex = '|'.join('(?P<%s>%s)' % pair for pair in token_specification)
-        self.code = code
+        buf = code.encode()
+        end = len(buf)
+        pos = 0
 
         stack = []
         group = []
 
-        while True:
-            mo = self.match()
-            if mo is None:
-                break
-
-            kind = mo[0]
-            value = mo[1]
-
-            if kind == 'NUMBER':
-                value = DecimalNumber(value)
-            elif kind == 'GRPSTART':
+        while pos < end:
+            c = buf[pos]
+            if c <= 32:
+                pos += 1
+                continue
+            elif _is_digit(c) or c == _POINT:
+                value, pos = self.number(buf, pos, end)
+                group.append(Token('NUMBER', value))
+                continue
+            elif _is_alpha(c):
+                start = pos
+                pos += 1
+                while pos < end:
+                    c = buf[pos]
+                    if not (_is_alpha(c) or 48 <= c <= 57):
+                        break
+                    pos += 1
+                group.append(Token('IDENTIFIER', code[start:pos]))
+                continue
+            elif c == _OPEN:
                 stack.append(group)
                 group = []
-                continue
-            elif kind == 'GRPEND':
-                group_token = Token('list',group)
+            elif c == _CLOSE:
+                if len(stack) == 0:
+                    raise RuntimeError('Unmatched parenthesis')
+                group_token = Token('list', group)
                 group = stack.pop()
                 group.append(group_token)
-                continue
-            elif kind == 'WHITESPACE':
-                continue
-
-            tok = Token(kind, value)
-            group.append(tok)
+            elif c == _STAR and pos + 1 < end and buf[pos + 1] == _STAR:
+                group.append(Token('OPERATOR', '**'))
+                pos += 1
+            elif c in SHIFTS and pos + 1 < end and buf[pos + 1] == c:
+                group.append(Token('OPERATOR', SHIFTS[c]))
+                pos += 1
+            else:
+                op = OPERATORS.get(c)
+                if op is None:
+                    # pos counts bytes, not characters: the excerpt comes from buf
+                    raise RuntimeError('Syntax error at "' + buf[pos:].decode() + '"')
+                group.append(Token('OPERATOR', op))
+            pos += 1
 
         if len(stack) > 0:
             raise RuntimeError('Unclosed parenthesis')
@@ -90,41 +194,694 @@ class Tokenizer:
 tokenizer = Tokenizer()
 
 
-def evaluate(expr):
-    stack = []
-    out = []
-    g = globals()
-    tokens = tokenizer.tokenize(expr)
-    print('tokens', tokens)
-    while len(tokens) > 0:
-        t = tokens.pop(0)
-        identifier = t.value
-        if t.type == "IDENTIFIER":
-            global_value = g[identifier]
-            if callable(global_value):
-                fn = global_value
-                arg = tokens.pop(0)
-                args = [to.value for to in arg.value]
-                res = fn(*args)
-                t.result = res
-                print('args', args, 'result', res)
-                out.append(t.final_value())
-            elif str(global_value).isdigit():
-                out.append( DecimalNumber(str(global_value)) )
-            else:
-                raise RuntimeError('Unknown identifier')
+def _integer_function(fn):
+    """ fn over ints, with DecimalNumber arguments and result """
+    def call(*args):
+        ints = []
+        for a in args:
+            n = a._to_integer()
+            if n is None:
+                raise DecimalNumberExceptionMathDomainError('Integer expected')
+            ints.append(n)
+        try:
+            return DecimalNumber(fn(*ints))
+        except ValueError as e:
+            raise DecimalNumberExceptionMathDomainError(e.args[0])
+    return call
+
+factorial = _integer_function(intmath.factorial)
+ncr = _integer_function(intmath.ncr)
+npr = _integer_function(intmath.npr)
+gcd = _integer_function(intmath.gcd)
+lcm = _integer_function(intmath.lcm)
+
+# The unit of the angles: the arguments of sin, cos and tan and the results of
+# asin, acos, atan and atan2 are in degrees when this is set, in radians
+# otherwise.  It is read at each call, so compiled expressions follow it.
+DEGREES = False
+# digits beyond the scale of an inverse function converted to degrees
+DEGREES_GUARD = 4
+
+def sin(x):
+    return x.sin(DEGREES)
+
+def cos(x):
+    return x.cos(DEGREES)
+
+def tan(x):
+    return x.tan(DEGREES)
+
+def _degrees(fn):
+    """ fn, an inverse trigonometric function, with its result in degrees
+        when DEGREES is set, converted with guard digits
+    """
+    def call(*args):
+        if not DEGREES:
+            return fn(*args)
+        context = DecimalContext().extend(DEGREES_GUARD)
+        r = context.mul(fn(*args, context=context), DecimalNumber(180))
+        return DecimalContext().round(context.div(r, DecimalNumber.pi(context)))
+    return call
+
+asin = _degrees(DecimalNumber.asin)
+acos = _degrees(DecimalNumber.acos)
+atan = _degrees(DecimalNumber.atan)
+atan2 = _degrees(DecimalNumber.atan2)
+
+# Functions which can be called from an expression: name -> (callable, arity)
+# Functions with an arity of 0 may also be used without parentheses, e.g. pi
+FUNCTIONS = {
+    'abs': (DecimalNumber.__abs__, 1),
+    'sqrt': (DecimalNumber.square_root, 1),
+    'root': (DecimalNumber.nthroot, 2),
+    'exp': (DecimalNumber.exp, 1),
+    'ln': (DecimalNumber.ln, 1),
+    'sin': (sin, 1),
+    'cos': (cos, 1),
+    'tan': (tan, 1),
+    'asin': (asin, 1),
+    'acos': (acos, 1),
+    'atan': (atan, 1),
+    'atan2': (atan2, 2),
+    'fact': (factorial, 1),
+    'ncr': (ncr, 2),
+    'npr': (npr, 2),
+    'gcd': (gcd, 2),
+    'lcm': (lcm, 2),
+    'pi': (DecimalNumber.pi, 0),
+    'e': (DecimalNumber.e, 0),
+}
+
+def lookup_function(name, nargs):
+    """ Resolve a function through the registry, checking the argument count """
+    entry = FUNCTIONS.get(name)
+    if entry is None:
+        raise RuntimeError('Unknown function ' + name)
+    fn, arity = entry
+    if nargs != arity:
+        raise RuntimeError(name + '() takes ' + str(arity) + ' argument(s)')
+    return fn
+
+def _power(a, b):
+    return a ** b
+
+# Each of the following builds a closure for one node of the expression tree.
+# A compiled expression is just nested closures that take the list of variable
+# values (Variables.values) and return a DecimalNumber, so evaluating it never
+# touches the tokenizer or the python compiler.  Variables are resolved to
+# their slot index at compile time.
+
+def _const(value):
+    return lambda env: value
+
+def _variable(slot):
+    return lambda values: values[slot]
+
+def _decimal_variable(slot):
+    # a variable in the expression of a form, which may hold a Fraction
+    return lambda values: _decimal(values[slot])
+
+def _neg(a):
+    return lambda env: -a(env)
+
+def _add(a, b):
+    return lambda env: a(env) + b(env)
+
+def _sub(a, b):
+    return lambda env: a(env) - b(env)
+
+def _mul(a, b):
+    return lambda env: a(env) * b(env)
+
+def _div(a, b):
+    return lambda env: a(env) / b(env)
+
+def _pow(a, b):
+    return lambda env: _power(a(env), b(env))
+
+def _call(fn, args):
+    if len(args) == 0:
+        return lambda env: fn()
+    if len(args) == 1:
+        a = args[0]
+        return lambda env: fn(a(env))
+    return lambda env: fn(*[arg(env) for arg in args])
+
+# The functions of an expression (FORMS) get the expression compiled, and
+# call it for each value of its variable, in slot of the Variables store.
+# They compute on DecimalNumber in every mode.
+
+def _decimal(value):
+    return value.to_decimal() if type(value) is Fraction else value
+
+def _solve(body, slot, args):
+    start = args[0]
+    def node(values):
+        def f(x):
+            values[slot] = x
+            return _decimal(body(values))
+        root = solver.solve(f, _decimal(start(values)))
+        values[slot] = root
+        return root
+    return node
+
+def _integrate(body, slot, args):
+    lower, upper = args
+    def node(values):
+        saved = values[slot]
+        def f(x):
+            values[slot] = x
+            return _decimal(body(values))
+        try:
+            return quadrature.integrate(f, _decimal(lower(values)), _decimal(upper(values)))
+        finally:
+            values[slot] = saved
+    return node
+
+# sum() adds at most MAX_TERMS terms: sum(1, i, 1, 1e9) would lock the
+# calculator up
+MAX_TERMS = 10000
+
+def _sum(body, slot, args, zero=None):
+    first, last = args
+    def node(values):
+        saved = values[slot]
+        a = Fraction.from_decimal(first(values))
+        b = Fraction.from_decimal(last(values))
+        if a.denominator != 1 or b.denominator != 1:
+            raise DecimalNumberExceptionMathDomainError('Integer expected')
+        if b.numerator - a.numerator >= MAX_TERMS:
+            raise DecimalNumberExceptionMathDomainError('Too many terms')
+        s = DecimalNumber(0) if zero is None else zero
+        try:
+            for i in range(a.numerator, b.numerator + 1):
+                values[slot] = DecimalNumber(i)
+                s = s + body(values)
+        finally:
+            values[slot] = saved
+        return s
+    return node
+
+def _fraction_sum(body, slot, args):
+    """ sum() in fraction mode: the terms and the total are Fractions """
+    return _sum(body, slot, args, Fraction())
+
+# name: (node builder, variable, arity).  The variable is None when the
+# second argument names it, it is not counted in the arity.
+FORMS = {
+    'solve': (_solve, 'x', 2),
+    'integrate': (_integrate, 'x', 3),
+    'sum': (_sum, None, 3),
+}
+
+def _split_arguments(tokens):
+    """ the token lists of a comma separated argument list """
+    groups = [[]]
+    for t in tokens:
+        if t.type == 'OPERATOR' and t.value == ',':
+            groups.append([])
         else:
-            out.append(t.value)
-
+            groups[-1].append(t)
+    return groups
+
+# operator: (binding power, right associative, value function, node builder)
+BINARY = {
+    '+': (10, False, lambda a, b: a + b, _add),
+    '-': (10, False, lambda a, b: a - b, _sub),
+    '*': (20, False, lambda a, b: a * b, _mul),
+    '/': (20, False, lambda a, b: a / b, _div),
+    '^': (30, True, _power, _pow),
+    '**': (30, True, _power, _pow),
+}
+# unary minus binds tighter than * and / but looser than ^, so -2^2 == -4
+UNARY = 25
+# the postfix n! binds tightest: 2^3! == 2^6 and -3! == -6
+POSTFIX = 40
+
+
+class Parser:
+    """ Pratt parser over a list of tokens (as produced by Tokenizer) which
+        builds a tree of closures.  Parenthesized groups arrive as nested
+        'list' tokens; the parser steps into them by swapping its token list
+        and cursor rather than creating a sub-parser.
+
+        The node building methods (constant, variable, negate, binary, call)
+        are overridden by Evaluator to compute values instead.
+    """
+
+    operators = BINARY
+
+    def __init__(self, tokens, env=None):
+        self.tokens = tokens
+        self.pos = 0
+        self.env = env
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None
 
-    eval_str = ""
-    for i in out:
-        if type(i) == str:
-            eval_str = eval_str + i
-        else:
-            eval_str = eval_str + repr(i)
-    print('eval:', eval_str)
-    return eval(eval_str)
+    def next(self):
+        t = self.peek()
+        if t is None:
+            raise RuntimeError('Incomplete expression')
+        self.pos += 1
+        return t
+
+    def parse(self):
+        node = self.expression()
+        if self.peek() is not None:
+            raise RuntimeError('Unexpected "' + str(self.peek()) + '"')
+        return node
+
+    def group(self, tokens, arguments=False):
+        """ parse the contents of a parenthesized group """
+        saved_tokens = self.tokens
+        saved_pos = self.pos
+        self.tokens = tokens
+        self.pos = 0
+        try:
+            if arguments:
+                return self.arguments()
+            return self.parse()
+        finally:
+            self.tokens = saved_tokens
+            self.pos = saved_pos
+
+    def expression(self, rbp=0):
+        left = self.prefix(self.next())
+        while True:
+            t = self.peek()
+            if t is None or t.type != 'OPERATOR':
+                return left
+            if t.value == '!' and POSTFIX > rbp:
+                self.pos += 1
+                left = self.call(factorial, [left])
+                continue
+            entry = self.operators.get(t.value)
+            if entry is None:
+                return left
+            lbp, right_assoc, fn, build = entry
+            if lbp <= rbp:
+                return left
+            self.pos += 1
+            right = self.expression(lbp - 1 if right_assoc else lbp)
+            left = self.binary(fn, build, left, right)
+
+    def prefix(self, t):
+        if t.type == 'NUMBER':
+            return self.constant(t.value)
+        elif t.type == 'list':
+            return self.group(t.value)
+        elif t.type == 'IDENTIFIER':
+            following = self.peek()
+            if following is not None and following.type == 'list':
+                self.pos += 1
+                if t.value in FORMS:
+                    return self.form(t.value, following.value)
+                args = self.group(following.value, True)
+                return self.call(lookup_function(t.value, len(args)), args)
+            entry = FUNCTIONS.get(t.value)
+            if entry is not None and entry[1] == 0:
+                return self.call(entry[0], [])
+            return self.variable(t.value)
+        elif t.type == 'OPERATOR' and t.value == '-':
+            return self.negate(self.expression(UNARY))
+        elif t.type == 'OPERATOR' and t.value == '+':
+            return self.expression(UNARY)
+        elif t.type == 'OPERATOR' and t.value == '~':
+            return self.invert(self.expression(UNARY))
+        raise RuntimeError('Unexpected "' + str(t) + '"')
+
+    def arguments(self):
+        """ parse a comma separated argument list """
+        args = []
+        if self.peek() is None:
+            return args
+        while True:
+            args.append(self.expression())
+            t = self.peek()
+            if t is None:
+                return args
+            if t.type != 'OPERATOR' or t.value != ',':
+                raise RuntimeError('Unexpected "' + str(t) + '"')
+            self.pos += 1
+
+    def constant(self, value):
+        return _const(value)
+
+    def variable(self, name):
+        if self.env is None or name not in self.env:
+            raise RuntimeError('Unknown identifier ' + name)
+        return _variable(self.env.slot(name))
+
+    def negate(self, a):
+        return _neg(a)
+
+    def invert(self, a):
+        raise RuntimeError('~ needs programmer mode')
+
+    def binary(self, fn, build, a, b):
+        return build(a, b)
+
+    def call(self, fn, args):
+        return _call(fn, args)
+
+    def form(self, name, tokens, parser=None, build=None):
+        """ solve(expr, x0), sum(expr, i, a, b)... see FORMS.  The expression and the arguments
+            are compiled for DecimalNumber whatever the mode, by a FormParser
+            over the same Variables, unless another parser and node builder
+            are given.
+        """
+        default, variable, arity = FORMS[name]
+        if parser is None:
+            parser = FormParser
+        if build is None:
+            build = default
+        groups = _split_arguments(tokens)
+        if variable is None:
+            if len(groups) < 2 or len(groups[1]) != 1 or groups[1][0].type != 'IDENTIFIER':
+                raise RuntimeError(name + '() needs a variable name')
+            variable = groups[1][0].value
+            del groups[1]
+        if len(groups) != arity:
+            raise RuntimeError(name + '() takes ' + str(arity) + ' argument(s)')
+        if not isinstance(self.env, Variables):
+            raise RuntimeError(name + '() needs a Variables store')
+        slot = self.env.slot(variable)
+        body = parser(groups[0], self.env).parse()
+        args = [parser(g, self.env).parse() for g in groups[1:]]
+        return build(body, slot, args)
+
+
+class FormParser(Parser):
+    """ Compiles the expression and the arguments of a form: the variables
+        may hold Fractions, stored in fraction mode, and enter as DecimalNumber.
+    """
+
+    def variable(self, name):
+        if self.env is None or name not in self.env:
+            raise RuntimeError('Unknown identifier ' + name)
+        return _decimal_variable(self.env.slot(name))
+
+
+class Evaluator(Parser):
+    """ Walks the token groups with the same cursor as Parser, but computes
+        each node's DecimalNumber value directly instead of building closures.
+        This is cheaper than compiling when an expression is evaluated once.
+    """
+
+    def constant(self, value):
+        return value
+
+    def variable(self, name):
+        if self.env is None or name not in self.env:
+            raise RuntimeError('Unknown identifier ' + name)
+        return self.env[name]
+
+    def negate(self, a):
+        return -a
+
+    def binary(self, fn, build, a, b):
+        return fn(a, b)
+
+    def call(self, fn, args):
+        return fn(*args)
+
+    def form(self, name, tokens):
+        return Parser.form(self, name, tokens)(self.env.values)
+
+
+def _fraction_variable(slot):
+    return lambda values: Fraction.from_decimal(values[slot])
+
+def _decimal_function(fn):
+    """ fn over DecimalNumber, with Fraction arguments and result """
+    def call(*args):
+        res = fn(*[a.to_decimal() if isinstance(a, Fraction) else a for a in args])
+        return Fraction.from_decimal(res)
+    return call
+
+def _fraction_integer_function(fn):
+    """ fn over ints, with Fraction arguments and result """
+    def call(*args):
+        ints = []
+        for a in args:
+            if a.denominator != 1:
+                raise DecimalNumberExceptionMathDomainError('Integer expected')
+            ints.append(a.numerator)
+        try:
+            return Fraction(fn(*ints))
+        except ValueError as e:
+            raise DecimalNumberExceptionMathDomainError(e.args[0])
+    return call
+
+# The functions of FUNCTIONS with an exact result in fraction mode, and
+# their Fraction version; the others go through DecimalNumber.
+EXACT_FUNCTIONS = {
+    DecimalNumber.__abs__: Fraction.__abs__,
+    DecimalNumber.square_root: Fraction.square_root,
+    factorial: _fraction_integer_function(intmath.factorial),
+    ncr: _fraction_integer_function(intmath.ncr),
+    npr: _fraction_integer_function(intmath.npr),
+    gcd: _fraction_integer_function(intmath.gcd),
+    lcm: _fraction_integer_function(intmath.lcm),
+}
+
+
+class FractionParser(Parser):
+    """ Compiles an expression for fraction mode: the numbers and the
+        variables enter as exact Fractions and the arithmetic stays exact.
+        The functions of EXACT_FUNCTIONS compute on Fraction; the others
+        (sin, ln...) have no exact result, they compute with DecimalNumber at
+        the scale and their result is taken back exactly.
+    """
+
+    def constant(self, value):
+        return _const(Fraction.from_decimal(value))
+
+    def variable(self, name):
+        if self.env is None or name not in self.env:
+            raise RuntimeError('Unknown identifier ' + name)
+        return _fraction_variable(self.env.slot(name))
+
+    def call(self, fn, args):
+        exact = EXACT_FUNCTIONS.get(fn)
+        return _call(exact if exact is not None else _decimal_function(fn), args)
+
+    def form(self, name, tokens):
+        if name == 'sum':
+            # the terms are exact unless a function isn't, see EXACT_FUNCTIONS
+            return Parser.form(self, name, tokens, FractionParser, _fraction_sum)
+        node = Parser.form(self, name, tokens)
+        # the result of the form carries the guard digits of deferred mode
+        return lambda values: Fraction.from_decimal(node(values).normalize())
+
+
+# Programmer mode: the values are ints in 0 .. mask, every node masks its
+# result, so the arithmetic wraps around like the registers of a CPU.
+# The builders take the mask of the width as a third argument.
+
+def _int_constant(value, mask):
+    n = value._to_integer()
+    if n is None:
+        raise DecimalNumberExceptionMathDomainError('Integer expected')
+    return _const(n & mask)
+
+def _int_variable(slot, mask):
+    def read(values):
+        v = values[slot]
+        if type(v) is not int:
+            v = programmer.to_int(v)
+        return v & mask
+    return read
+
+def _int_add(a, b, mask):
+    return lambda env: (a(env) + b(env)) & mask
+
+def _int_sub(a, b, mask):
+    return lambda env: (a(env) - b(env)) & mask
+
+def _int_mul(a, b, mask):
+    return lambda env: (a(env) * b(env)) & mask
+
+def _int_divmod(a, b, mod):
+    if b == 0:
+        raise DecimalNumberExceptionDivisionByZeroError('Division by zero')
+    return a % b if mod else a // b
+
+def _int_div(a, b, mask):
+    return lambda env: _int_divmod(a(env), b(env), False)
+
+def _int_mod(a, b, mask):
+    return lambda env: _int_divmod(a(env), b(env), True)
+
+def _int_pow(a, b, mask):
+    return lambda env: pow(a(env), b(env), mask + 1)
+
+def _int_and(a, b, mask):
+    return lambda env: a(env) & b(env)
+
+def _int_or(a, b, mask):
+    return lambda env: a(env) | b(env)
+
+def _int_xor(a, b, mask):
+    return lambda env: a(env) ^ b(env)
+
+def _int_shl(a, b, mask):
+    # the shift count is capped, past the width the result is 0 anyway
+    return lambda env: (a(env) << min(b(env), 64)) & mask
+
+def _int_shr(a, b, mask):
+    return lambda env: a(env) >> min(b(env), 64)
+
+# The C operators and precedences, and ^ is exclusive or: ** is the power.
+INTEGER_BINARY = {
+    '|': (4, False, None, _int_or),
+    '^': (5, False, None, _int_xor),
+    '&': (6, False, None, _int_and),
+    '<<': (8, False, None, _int_shl),
+    '>>': (8, False, None, _int_shr),
+    '+': (10, False, None, _int_add),
+    '-': (10, False, None, _int_sub),
+    '*': (20, False, None, _int_mul),
+    '/': (20, False, None, _int_div),
+    '%': (20, False, None, _int_mod),
+    '**': (30, True, None, _int_pow),
+}
+
+
+class IntegerParser(Parser):
+    """ Compiles an expression for programmer mode: ints masked to 'width'
+        bits, without any DecimalNumber at run time.  The numbers must be
+        integers, the variables are truncated to one.
+    """
+
+    operators = INTEGER_BINARY
+
+    def __init__(self, tokens, env=None, width=32):
+        super().__init__(tokens, env)
+        self.mask = (1 << width) - 1
+
+    def constant(self, value):
+        return _int_constant(value, self.mask)
+
+    def variable(self, name):
+        if self.env is None or name not in self.env:
+            raise RuntimeError('Unknown identifier ' + name)
+        return _int_variable(self.env.slot(name), self.mask)
+
+    def negate(self, a):
+        mask = self.mask
+        return lambda env: -a(env) & mask
+
+    def invert(self, a):
+        mask = self.mask
+        return lambda env: a(env) ^ mask
+
+    def binary(self, fn, build, a, b):
+        return build(a, b, self.mask)
+
+    def call(self, fn, args):
+        raise RuntimeError('No functions in programmer mode')
+
+    def form(self, name, tokens):
+        raise RuntimeError(name + '() not available in programmer mode')
+
+
+class Variables:
+    """ Slot-backed variable store.  Values live in a flat list and each name
+        maps to a fixed index into it, so compiled expressions read a variable
+        with a single list index rather than a name lookup.  Slots are never
+        removed, so an index stays valid for the lifetime of the store.
+    """
+
+    def __init__(self, names=()):
+        self.values = []
+        self.index = {}
+        for name in names:
+            self.slot(name)
+
+    def slot(self, name):
+        """ Return the slot index for name, allocating a new slot if needed """
+        i = self.index.get(name)
+        if i is None:
+            i = len(self.values)
+            self.index[name] = i
+            self.values.append(DecimalNumber(0))
+        return i
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __getitem__(self, name):
+        return self.values[self.index[name]]
+
+    def __setitem__(self, name, value):
+        self.values[self.slot(name)] = value
+
+
+class Expression:
+    """ A compiled expression. Call it with the Variables store it was
+        compiled against to evaluate it.  For an assignment such as
+        `M3 = 2 * M1`, `target` is the slot of the variable on the left hand
+        side and the result is stored there, otherwise target is None.
+    """
+
+    def __init__(self, fn, target=None, target_name=None):
+        self.fn = fn
+        self.target = target
+        self.target_name = target_name
+
+    def __call__(self, variables):
+        # The intermediate results are not normalized (see
+        # DecimalNumber.set_deferred), only the final one.
+        with DecimalContext(deferred=True):
+            res = self.fn(variables.values)
+            if isinstance(res, DecimalNumber):
+                res = res.normalize()
+        if self.target is not None:
+            variables.values[self.target] = res
+        return res
+
+
+# Compiled expressions keyed by their source text, variable store and mode.
+cache = LRUCache(16)
+
+def compile_expression(text, variables, fractions=False, width=0):
+    """ Compile one line of input to an Expression, reusing a cached
+        Expression when the same text was compiled recently.
+        With fractions=True the expression computes exact Fractions, with a
+        width (8, 16, 32 or 64) it computes ints of that many bits.
+    """
+    key = (text, variables, fractions, width)
+    expr = cache.get(key)
+    if expr is not None:
+        return expr
+
+    tokens = tokenizer.tokenize(text)
+    target = None
+    target_name = None
+    if (len(tokens) > 2 and tokens[0].type == 'IDENTIFIER'
+            and tokens[1].type == 'OPERATOR' and tokens[1].value == '='):
+        target_name = tokens[0].value
+        tokens = tokens[2:]
+    if width:
+        fn = IntegerParser(tokens, variables, width).parse()
+    else:
+        fn = (FractionParser if fractions else Parser)(tokens, variables).parse()
+    if target_name is not None:
+        target = variables.slot(target_name)
+    expr = Expression(fn, target, target_name)
+    cache.put(key, expr)
+    return expr
+
+
+def evaluate(expr, env=None):
+    """ Evaluate an expression once, without compiling it.
+        env optionally maps variable names to values (a dict or Variables).
+    """
+    return Evaluator(tokenizer.tokenize(expr), env).parse()
 
 class Interpreter:
     lines = []
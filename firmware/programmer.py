@@ -0,0 +1,29 @@
+# Programmer mode: expressions on ints masked to a fixed width, see
+# mathexpr.IntegerParser.  This module has the conversions and the display.
+
+from fraction import Fraction
+
+WIDTHS = (8, 16, 32, 64)
+# display bases, in the order the 'base' menu item cycles through them
+BASES = (16, 10, 8, 2)
+_FORMATS = {16: '{:X}h', 10: '{:d}', 8: '{:o}o', 2: '{:b}b'}
+
+
+def to_int(value):
+    """ An int, DecimalNumber or Fraction truncated to an int """
+    if type(value) is int:
+        return value
+    f = Fraction.from_decimal(value)
+    if f.numerator < 0:
+        return -(-f.numerator // f.denominator)
+    return f.numerator // f.denominator
+
+
+def format_int(value, base=16, max_length=17):
+    """ The masked value in base, e.g. 'FFh', '255', '377o' or '11111111b';
+        hexadecimal when it doesn't fit in max_length
+    """
+    s = _FORMATS[base].format(value)
+    if len(s) > max_length:
+        s = _FORMATS[16].format(value)
+    return s
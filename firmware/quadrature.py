@@ -0,0 +1,163 @@
+# Numeric integration on a compiled expression, see mathexpr FORMS:
+# integrate(expr, a, b) is the integral of expr in x from a to b.
+
+import math
+from decimal import DecimalNumber, DecimalContext, DecimalNumberExceptionMathDomainError
+
+# The Gauss-Legendre rule on each panel, exact for polynomials of degree
+# 2 * POINTS - 1.  POINTS is even: the nodes are symmetric around 0.
+POINTS = 10
+# digits beyond the scale in the computation of the nodes
+GUARD = 4
+# panels are halved at most MAX_DEPTH times
+MAX_DEPTH = 40
+# The rule on the halves of a panel is about 2**(2 * POINTS) more accurate
+# than on the whole panel, so their difference only has to be below
+# 10**-(scale - SLACK) times the magnitude of the integral for the halves
+# to be exact to the scale.
+SLACK = 5
+
+# scale: [(node, weight)...] for the nodes > 0, computed once per scale
+_tables = {}
+
+
+def _legendre(n, x, one):
+    """ (P_n(x), P_n-1(x)) in fixed point: x and the results times 'one' """
+    p0, p1 = one, x
+    for k in range(2, n + 1):
+        p0, p1 = p1, ((2 * k - 1) * x * p1 // one - (k - 1) * p0) // k
+    return p1, p0
+
+
+def _gauss_legendre(n, digits):
+    """ The nodes x > 0 and weights of the n point rule, times 10**digits.
+        The nodes are the roots of the Legendre polynomial P_n: Newton's
+        method starts from the float approximation, each step doubles the
+        digits, the weights are 2 / ((1 - x²) P_n'(x)²).
+    """
+    one = 10 ** digits
+    table = []
+    for i in range(n // 2):
+        x = int(math.cos(math.pi * (i + 0.75) / (n + 0.5)) * 10 ** 15) * one // 10 ** 15
+        while True:
+            p, q = _legendre(n, x, one)
+            dp = n * (x * p // one - q) * one // (x * x // one - one)
+            dx = p * one // dp
+            x -= dx
+            if -1 <= dx <= 1:
+                break
+        p, q = _legendre(n, x, one)
+        dp = n * (x * p // one - q) * one // (x * x // one - one)
+        w = 2 * one ** 3 // ((one - x * x // one) * dp // one * dp)
+        table.append((x, w))
+    return table
+
+
+def nodes():
+    """ [(node, weight)...] of the rule at the current scale, as DecimalNumber """
+    scale = DecimalNumber.get_scale()
+    table = _tables.get(scale)
+    if table is None:
+        digits = scale + GUARD
+        table = [(DecimalNumber(x, digits), DecimalNumber(w, digits))
+                 for x, w in _gauss_legendre(POINTS, digits)]
+        _tables[scale] = table
+    return table
+
+
+def _panel(f, a, b, table):
+    """ The rule on [a, b] """
+    c = (a + b) / 2
+    h = (b - a) / 2
+    s = DecimalNumber(0)
+    for x, w in table:
+        d = h * x
+        s = s + w * (f(c + d) + f(c - d))
+    return s * h
+
+
+class _Singular(DecimalNumberExceptionMathDomainError):
+    """ no convergence inside the interval: not at an end, where _smoothed
+        may help, but at a pole (1 / x from -1 to 1)
+    """
+
+
+def _adaptive(f, a, b, whole, tolerance, depth, table, ulp, ends):
+    m = (a + b) / 2
+    left = _panel(f, a, m, table)
+    right = _panel(f, m, b, table)
+    halves = left + right
+    # Halves that cancel out agree with the whole by symmetry, whatever f
+    # does around m: they are halved again.
+    cancel = abs(halves) <= tolerance < abs(left)
+    if abs(halves - whole) <= tolerance and not cancel:
+        return halves
+    if depth == MAX_DEPTH:
+        if a != ends[0] and b != ends[1]:
+            raise _Singular('Singular point')
+        raise DecimalNumberExceptionMathDomainError('No convergence')
+    # each half gets half the tolerance, but no less than the last digit
+    tolerance = max(tolerance / 2, ulp)
+    return (_adaptive(f, a, m, left, tolerance, depth + 1, table, ulp, ends) +
+            _adaptive(f, m, b, right, tolerance, depth + 1, table, ulp, ends))
+
+
+def _smoothed(f, a, b):
+    """ f(x) dx in t over [0, 1], with x = a + (b - a) t² (3 - 2 t): dx/dt
+        vanishes at both ends, which damps a singularity of f at a or b
+        (ln(x) or 1 / sqrt(x) at 0) into a function the rule can handle
+    """
+    w = (b - a) * 6
+    # DecimalNumber on the left: MicroPython has no __rsub__
+    one = DecimalNumber(1)
+    three = DecimalNumber(3)
+    def g(t):
+        return f(a + (b - a) * t * t * (three - t * 2)) * w * t * (one - t)
+    return g
+
+
+def _tolerance(magnitude, scale):
+    tolerance = DecimalNumber(1, max(scale - SLACK, 0))
+    if magnitude > 1:
+        tolerance = tolerance * magnitude
+    return tolerance
+
+
+def _integrate(f, a, b, table, scale):
+    whole = _panel(f, a, b, table)
+    tolerance = _tolerance(abs(whole), scale)
+    ulp = DecimalNumber(1, scale)
+    res = _adaptive(f, a, b, whole, tolerance, 0, table, ulp, (a, b))
+    # The rule on the whole interval may be far from the integral: the
+    # tolerance comes from the result when that is much smaller.
+    refined = _tolerance(abs(res), scale)
+    if refined < tolerance / 2:
+        res = _adaptive(f, a, b, whole, refined, 0, table, ulp, (a, b))
+    return res
+
+
+def integrate(f, a, b):
+    """ The integral of f, a callable over DecimalNumber, from a to b, by
+        adaptive Gauss-Legendre: a panel is halved until the rule on its
+        halves agrees with the rule on the whole (see SLACK).
+        When that needs more than MAX_DEPTH halvings, as at a singularity
+        at an end, the integral is computed again in the variable of
+        _smoothed.  At a singularity inside the interval it raises.
+    """
+    if a == b:
+        return DecimalNumber(0)
+    scale = DecimalNumber.get_scale()
+    # The rule multiplies the values of f by widths up to |b - a|: f gets
+    # a digit more per digit of the width, for the integral to keep the
+    # last digit of the scale (1 / x from 1 to 1e10 is below 1e-9 on most
+    # of the interval).
+    wide = len(str(abs(b - a).to_int_truncate())) - 1
+    with DecimalContext(scale + wide, DecimalNumber.get_deferred()):
+        table = nodes()
+        try:
+            res = _integrate(f, a, b, table, scale)
+        except _Singular:
+            raise
+        except DecimalNumberExceptionMathDomainError:
+            res = _integrate(_smoothed(f, a, b), DecimalNumber(0), DecimalNumber(1), table, scale)
+    return DecimalContext().round(res).normalize()
@@ -0,0 +1,72 @@
+from decimal import DecimalNumber
+
+# The operator keys in RPN mode: symbol -> fn(y, x)
+OPERATORS = {
+    '+': DecimalNumber.__add__,
+    '-': DecimalNumber.__sub__,
+    '*': DecimalNumber.__mul__,
+    '/': DecimalNumber.__truediv__,
+}
+
+
+class Stack:
+    """ The operand stack of RPN mode, with a fixed capacity.
+        The values live in a list allocated once and used as a ring: push and
+        pop only move an index, nothing is resized.  When the stack is full a
+        push drops the oldest value, like the T register of an HP calculator.
+    """
+
+    def __init__(self, capacity=16):
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self._data = [None] * self.capacity
+        self._top = 0       # the slot of the next push
+        self._len = 0
+
+    def push(self, x):
+        self._data[self._top] = x
+        self._top = (self._top + 1) % self.capacity
+        if self._len < self.capacity:
+            self._len += 1
+
+    def pop(self):
+        if self._len == 0:
+            raise RuntimeError('Stack empty')
+        self._top = (self._top - 1) % self.capacity
+        self._len -= 1
+        x = self._data[self._top]
+        self._data[self._top] = None
+        return x
+
+    def peek(self, i=0):
+        """ The i-th value from the top: 0 is x, 1 is y... """
+        if i >= self._len:
+            raise RuntimeError('Stack empty')
+        return self._data[(self._top - 1 - i) % self.capacity]
+
+    def apply(self, fn):
+        """ Replace y and x, the two values on top, with fn(y, x).
+            The stack is left as it was if fn raises.
+        """
+        if self._len < 2:
+            raise RuntimeError('Needs 2 values')
+        r = fn(self.peek(1), self.peek(0))
+        self.pop()
+        self._data[(self._top - 1) % self.capacity] = r
+        return r
+
+    def swap(self):
+        if self._len < 2:
+            raise RuntimeError('Needs 2 values')
+        data = self._data
+        i = (self._top - 1) % self.capacity
+        j = (self._top - 2) % self.capacity
+        data[i], data[j] = data[j], data[i]
+
+    def __len__(self):
+        return self._len
+
+    def __repr__(self):
+        return 'Stack(' + str(self._len) + '/' + str(self.capacity) + ')'
@@ -0,0 +1,188 @@
+# Numeric root finding on a compiled expression, see mathexpr FORMS:
+# solve(expr, x0) finds an x near x0 where expr is 0.
+
+from decimal import DecimalNumber, DecimalNumberException, DecimalNumberExceptionMathDomainError
+
+try:
+    from time import ticks_ms, ticks_diff
+except ImportError:
+    from time import time
+
+    def ticks_ms():
+        return int(time() * 1000)
+
+    def ticks_diff(a, b):
+        return a - b
+
+MAX_ITERATIONS = 100
+# the characters on a line of the display: the result is final when its
+# first DISPLAY_LENGTH characters stop changing
+DISPLAY_LENGTH = 17
+# the steps toward x tried when f is undefined at the next point
+MAX_RETRIES = 8
+# the search for a sign change goes up to 2**MAX_EXPAND times further
+MAX_EXPAND = 40
+
+# (iterations, milliseconds) of the last solve
+last = None
+
+
+def _step(x):
+    """ The increment of the difference quotient at x: half the digits """
+    h = DecimalNumber(1, DecimalNumber.get_scale() // 2)
+    ax = abs(x)
+    return h * ax if ax > 1 else h
+
+
+def _display(x):
+    return x.normalize().to_string_max_length(DISPLAY_LENGTH)
+
+
+def _middle(a, b):
+    """ The point that bisects [a, b]: the geometric mean when a and b
+        have the same sign and very different magnitudes, so that a bracket
+        such as [1, 10**30] shrinks by orders of magnitude
+    """
+    if (a > 0 and b > 0) or (a < 0 and b < 0):
+        small, large = abs(a), abs(b)
+        if small > large:
+            small, large = large, small
+        if large > small * 1000:
+            m = (small * large).square_root()
+            return m if a > 0 else -m
+    return (a + b) / 2
+
+
+def _inside(x, a, b):
+    if a < b:
+        return a < x < b
+    return b < x < a
+
+
+def _expand(f, c, fc):
+    """ A point where f has the other sign than at c, and f there, or None.
+        The search goes outward from c, c +- 2, 4, 8... times max(|c|, 1),
+        and toward 0, c / 2, c / 4... for the roots at a smaller scale.
+    """
+    r = abs(c)
+    if r < 1:
+        r = DecimalNumber(1)
+    t = c
+    for j in range(MAX_EXPAND):
+        r = r * 2
+        t = t / 2
+        for x in (c + r, c - r, t):
+            if x == c:
+                continue
+            try:
+                y = f(x)
+            except DecimalNumberException:
+                continue
+            if y == 0 or (y < 0) != (fc < 0):
+                return x, y
+    return None
+
+
+def _bounded(f, x):
+    """ Whether f, 0 at x, is not 0 on both sides of x, at x +- h, 2h, 4h...
+        (or undefined there): x is a root, even when f is below the last
+        digit around it as x³ near 0.  f that only tends to 0, as 1/x for a
+        large x, stays 0 on one side.
+    """
+    h = _step(x)
+    for r in (h, -h):
+        for j in range(MAX_EXPAND):
+            try:
+                if f(x + r) != 0:
+                    break
+            except DecimalNumberException:
+                break
+            r = r * 2
+        else:
+            return False
+    return True
+
+
+def solve(f, x, max_iterations=MAX_ITERATIONS):
+    """ A root of f, a callable over DecimalNumber, near x.
+        Each iteration takes a Newton step, with the derivative from a
+        difference quotient, or a secant step through the previous point
+        when that fails (zero derivative, f undefined there).
+        Once f has changed sign the last points of each sign bracket the
+        root, and as in Dekker's method a step bisects the bracket instead
+        when it would leave it or is not less than half the step before,
+        so slow progress can't last.  Before that, a step that takes f
+        further from 0, or lands where f is undefined, starts a search for
+        a sign change (see _expand).
+        Stops when x reads the same on the display twice in a row, or f is
+        0 at x, which without a bracket must not be f rounded to 0 on one
+        side of x (see _bounded).
+    """
+    global last
+    start = ticks_ms()
+    fx = f(x)
+    neg = pos = None            # the bracket: points where f < 0 and f > 0
+    prev = fprev = None
+    step = None
+    shown = _display(x)
+    largest = abs(fx)
+    iterations = 0
+    while fx != 0:
+        if iterations == max_iterations:
+            raise DecimalNumberExceptionMathDomainError('No convergence')
+        iterations += 1
+        if fx < 0:
+            neg = x
+        else:
+            pos = x
+        nx = None
+        try:
+            h = _step(x)
+            d = (f(x + h) - fx) / h
+            if d != 0:
+                nx = x - fx / d
+        except DecimalNumberException:
+            pass
+        if nx is None and prev is not None and fprev != fx:
+            nx = x - fx * (x - prev) / (fx - fprev)
+        bracketed = neg is not None and pos is not None
+        bisect = bracketed and (nx is None or not _inside(nx, neg, pos) or
+                                (step is not None and abs(nx - x) * 2 >= abs(step)))
+        if bisect:
+            nx = _middle(neg, pos)
+        if nx is not None:
+            for retry in range(MAX_RETRIES):
+                try:
+                    fn = f(nx)
+                    break
+                except DecimalNumberException:
+                    if bisect and retry == MAX_RETRIES - 1:
+                        raise
+                    nx = (x + nx) / 2       # undefined there: a shorter step
+            else:
+                nx = None
+                if bracketed:
+                    nx = _middle(neg, pos)
+                    fn = f(nx)
+        if nx is not None:
+            text = _display(nx)
+            if text == shown:
+                x, fx = nx, fn
+                break
+        if not bracketed and (nx is None or
+                              ((fn < 0) == (fx < 0) and abs(fn) > abs(fx))):
+            found = _expand(f, x, fx)
+            if found is None:
+                raise DecimalNumberExceptionMathDomainError('No root found')
+            nx, fn = found
+        step = nx - x
+        prev, fprev = x, fx
+        x, fx = nx, fn
+        shown = _display(x)
+    if abs(fx) > largest:
+        # f grew toward x: a pole where f changes sign, not a root
+        raise DecimalNumberExceptionMathDomainError('No root found')
+    if fx == 0 and (neg is None or pos is None) and not _bounded(f, x):
+        raise DecimalNumberExceptionMathDomainError('No root found')
+    last = (iterations, ticks_diff(ticks_ms(), start))
+    return x.normalize()
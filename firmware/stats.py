@@ -0,0 +1,65 @@
+from decimal import DecimalNumber, DecimalContext
+
+
+class Statistics:
+    """ Streaming statistics over the values entered in statistics mode.
+        Each add() is O(1): it updates the count, the sums, the extremes and
+        the running mean and sum of squared deviations of Welford's algorithm,
+        https://en.wikipedia.org/wiki/Algorithms_for_calculating_variance#Welford's_online_algorithm
+        so the results are ready at any time without keeping the values.
+        The running values carry GUARD more decimals than the scale, the
+        results are rounded to it.
+    """
+
+    GUARD = 4
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.sum = DecimalNumber(0)
+        self.sum_squares = DecimalNumber(0)
+        self.min = None
+        self.max = None
+        self._mean = DecimalNumber(0)
+        self._m2 = DecimalNumber(0)
+
+    def add(self, x):
+        """ Account for one more value """
+        ctx = DecimalContext().extend(self.GUARD)
+        self.count += 1
+        ctx.add(self.sum, x, self.sum)
+        ctx.add(self.sum_squares, ctx.mul(x, x), self.sum_squares)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+        # Welford: mean += (x - mean) / n ; m2 += (x - old mean) * (x - new mean)
+        delta = ctx.sub(x, self._mean)
+        ctx.add(self._mean, ctx.div(delta, self.count), self._mean)
+        ctx.add(self._m2, ctx.mul(delta, ctx.sub(x, self._mean)), self._m2)
+
+    def total(self):
+        return self.sum.normalize()
+
+    def mean(self):
+        if self.count == 0:
+            raise RuntimeError('No values')
+        return self._mean.normalize()
+
+    def variance(self):
+        """ The sample variance, m2 / (n - 1) """
+        if self.count < 2:
+            raise RuntimeError('Needs 2 values')
+        return DecimalContext().extend(self.GUARD).div(self._m2, self.count - 1).normalize()
+
+    def stddev(self):
+        """ The sample standard deviation """
+        return self.variance().square_root()
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return 'Statistics(n=' + str(self.count) + ')'
@@ -68,17 +68,30 @@ def set_style(widget):
 
 # menus
 menu_pages = (
-    ('a1','b1','c1','d1'),
-    ('a2','b2','c2','d2'),
-    ('a3','b3','c3','d3'),
-    ('a4','b4','c4','d4'),
+    ('mean','sdev','sum','stat'),
+    ('frac','factor','prog','base'),
+    ('deg','n!','gcd','solve'),
+    ('bits','shift','A-D','E-F'),
 )
+# The pages opened by a menu item, by its label.  An item without a menu_
+# method in Calc inserts its label in the entry line: the operators and
+# literals of programmer mode, the function names.
+submenu_pages = {
+    'n!': ('!','fact(','ncr(','npr('),
+    'gcd': ('gcd(','lcm('),
+    'solve': ('solve(','integrate(','sum(','x'),
+    'bits': ('&','|','^','~'),
+    'shift': ('<<','>>','%','**'),
+    'A-D': ('A','B','C','D'),
+    'E-F': ('E','F','0x','0b'),
+}
 
 class Menu:
     def __init__(self, app):
         self.app = app
-        self.index = None
+        self.page = None
         self.pages = [ self.menu_page(menu_items) for menu_items in menu_pages ]
+        self.submenus = { name: self.menu_page(items) for name, items in submenu_pages.items() }
 
     def menu_page(self, items):
         page = lv.obj()
@@ -92,18 +105,19 @@ class Menu:
         return page
 
     def active_page(self):
-        if self.index is not None:
-            return self.pages[self.index]
-        else:
-            return None
+        return self.page
 
     def show(self, index):
-        self.index = index
-        lv.screen_load(self.pages[index])
+        self.page = self.pages[index]
+        lv.screen_load(self.page)
+
+    def show_submenu(self, name):
+        self.page = self.submenus[name]
+        lv.screen_load(self.page)
 
     def hide(self):
-        if self.index is not None:
-            self.index = None
+        if self.page is not None:
+            self.page = None
             lv.screen_load(self.app.scr)
 
     def label(self, page, text):